@@ -47,6 +47,18 @@ def get_args():
     parser.add_argument(
         "--av1-only", action="store_true", help="Encode using AV1 codec only."
     )
+    parser.add_argument(
+        "--pre-encode-workers",
+        type=int,
+        default=0,
+        help="Run the CRF searches of all files first, with this many processes (0 to disable).",
+    )
+    parser.add_argument(
+        "--parallel-crf-search",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Run the CRF searches of the encoders of a file at the same time.",
+    )
     return parser.parse_args()
 
 
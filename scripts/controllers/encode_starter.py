@@ -1,4 +1,5 @@
 import concurrent.futures
+import multiprocessing
 import os
 from pathlib import Path
 
@@ -9,7 +10,30 @@ from scripts.models.Log import SuccessLog
 from scripts.models.MediaFile import MediaFile
 from scripts.models.ProcessFiles import ProcessFiles, ProcessPhoneFiles, ProcessAudioFiles
 from scripts.settings.audio import TARGET_BIT_RATE_IPHONE_XR, AUDIO_ENCODED_ROOT_DIR
-from scripts.settings.video import OUTPUT_DIR_IPHONE
+from scripts.settings.video import OUTPUT_DIR_IPHONE, IPHONE_ENCODE_BATCH_SIZE, PIN_PHONE_WORKERS_TO_CPUS
+
+
+def init_phone_worker(worker_counter, processes: int, success_log_lock=None):
+    """
+    Initializes a phone encode worker process: numbers it and, if enabled, pins it to its share of CPU cores.
+
+    :param worker_counter: Shared counter handing out worker ids.
+    :param processes: Number of worker processes in the pool.
+    :param success_log_lock: Lock shared by the workers for writing the undated success log.
+    """
+    if success_log_lock is not None:
+        SuccessLog.set_undated_log_lock(success_log_lock)
+    with worker_counter.get_lock():
+        worker_id = worker_counter.value
+        worker_counter.value += 1
+    PhoneVideoEncoder.worker_id = worker_id
+
+    if PIN_PHONE_WORKERS_TO_CPUS and hasattr(os, "sched_setaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+        worker_cpus = cpus[worker_id % processes::processes]
+        if worker_cpus:
+            os.sched_setaffinity(0, worker_cpus)
+            logger.debug(f"Worker {worker_id} pinned to CPUs {worker_cpus}")
 
 
 class EncodeStarter:
@@ -40,6 +64,17 @@ class PhoneEncodeStarter(EncodeStarter):
             encoder = PhoneVideoEncoder(media_file, args=self.args)
         encoder.start()
 
+    def process_batch(self, paths: list):
+        # A file that cannot be loaded or prepared is logged and left out, the rest of the batch still encodes
+        encoders = []
+        for media_file in MediaFile.load_many(paths):
+            try:
+                encoders.append(PhoneVideoEncoder(media_file, args=self.args))
+            except Exception as e:
+                logger.error(f"Failed to prepare {media_file.path}: {e}")
+        if encoders:
+            PhoneVideoEncoder.start_batch(encoders)
+
     def process_multi_file(self):
         if self.args.audio_only:
             self.process_files = ProcessAudioFiles(self.project_dir, self.args)
@@ -48,9 +83,27 @@ class PhoneEncodeStarter(EncodeStarter):
         if not self.process_files.source_dir:
             return
         logger.info(f'remain files: {len(self.process_files.files)}')
-        with concurrent.futures.ProcessPoolExecutor(max_workers=self.args.processes) as executor:
-            for file in self.process_files.files:
-                executor.submit(self.process_single_file, file)
+        files = self.process_files.files
+        processes = self.args.processes or os.cpu_count() or 1
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=init_phone_worker,
+            initargs=(multiprocessing.Value("i", 0), processes, multiprocessing.Lock()),
+        ) as executor:
+            if self.args.audio_only:
+                futures = {executor.submit(self.process_single_file, file): [file] for file in files}
+            else:
+                # Video files are encoded in batches, without leaving workers idle when there are few files
+                batch_size = max(1, min(IPHONE_ENCODE_BATCH_SIZE, -(-len(files) // processes)))
+                futures = {
+                    executor.submit(self.process_batch, files[i:i + batch_size]): files[i:i + batch_size]
+                    for i in range(0, len(files), batch_size)
+                }
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Error processing {', '.join(map(str, futures[future]))}: {e}")
 
     def post_actions(self):
         self.process_files.remove_empty_dirs()
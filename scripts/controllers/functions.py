@@ -1,8 +1,12 @@
 import collections
+import errno
+import functools
+import os
+import shutil
 import subprocess
 import tempfile
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterator, List, Optional, Sequence
 
 from faster_whisper import WhisperModel
 from loguru import logger
@@ -12,41 +16,154 @@ if "encode" in __file__:
     from scripts.settings.common import LANGUAGE_WORDS
 
 
+@functools.cache
+def find_executable(name: str) -> str:
+    """
+    Resolves a program name to its full path once per process.
+
+    :param name: Program name, such as "ffmpeg".
+    :return: Full path of the program, or the name itself if it is not found on PATH.
+    """
+    return shutil.which(name) or name
+
+
 def run_cmd(
-    cmd: str,
+    cmd: Sequence[str],
     src: Path = Path(),
     dst: Path = Path(),
     show_cmd: bool = False,
     cmd_path: Optional[Path] = None,
 ) -> Optional[subprocess.CompletedProcess]:
     """
-    Executes a shell command and logs the output.
+    Executes a command without a shell and logs the output.
 
-    :param cmd: The command to execute.
+    :param cmd: The command to execute, as an argument list.
     :param src: Path to the source file for error logging.
     :param dst: Directory path for error logging.
     :param show_cmd: If True, logs the command before execution.
     :param cmd_path: If provided, appends the command to this file.
     :return: Result of the subprocess run, or None if an exception occurs.
     """
-    if show_cmd:
-        logger.debug(f"Executing command: {cmd}")
-
+    # The printable form of the command is only built when something consumes it
     if cmd_path:
         with cmd_path.open("a", encoding="utf-8") as cmd_file:
-            print(cmd, file=cmd_file)
+            print(subprocess.list2cmdline(cmd), file=cmd_file)
+    if show_cmd:
+        # Lazy, so the command is not joined when debug logging is off
+        logger.opt(lazy=True).debug(
+            "Executing command: {}", lambda: subprocess.list2cmdline(cmd)
+        )
+
+    # With a full program path and inherited descriptors kept (Python opens files non-inheritable),
+    # subprocess starts the child with posix_spawn instead of fork + exec on POSIX
+    cmd = [find_executable(cmd[0]), *cmd[1:]]
 
     try:
-        return subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8")
+        return subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            close_fds=os.name == "nt",
+        )
     except Exception as e:
         logger.error(f"Error executing command: {src}\n{e}")
         dst.mkdir(parents=True, exist_ok=True)
         if src and dst:
-            error_log = ErrorLog(dst)
-            error_log.write(cmd, str(e))
+            with ErrorLog(dst) as error_log:
+                error_log.write(subprocess.list2cmdline(cmd), str(e))
         return None
 
 
+@functools.cache
+def get_ffmpeg_encoders() -> frozenset[str]:
+    """
+    Lists the encoders of the installed ffmpeg. The list is read once per process.
+
+    :return: Names of the available encoders, empty if ffmpeg cannot be run.
+    """
+    try:
+        res = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"],
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+        )
+    except OSError as e:
+        logger.error(f"Cannot list ffmpeg encoders: {e}")
+        return frozenset()
+    if res.returncode != 0:
+        return frozenset()
+    # Encoder lines look like " V....D h264_nvenc           NVIDIA NVENC H.264 encoder",
+    # the legend above them like " V..... = Video"
+    return frozenset(
+        fields[1]
+        for fields in map(str.split, res.stdout.splitlines())
+        if len(fields) > 1
+        and len(fields[0]) == 6
+        and fields[0][0] in "VAS"
+        and fields[1] != "="
+    )
+
+
+@functools.cache
+def select_hw_video_encoder(candidates: tuple[str, ...]) -> Optional[str]:
+    """
+    Selects the first hardware video encoder that is usable on this machine. ffmpeg builds often list
+    hardware encoders without the hardware being present, so each candidate is checked with a one-frame
+    test encode. The result is cached per process.
+
+    :param candidates: Encoder names in order of preference.
+    :return: The selected encoder name, or None if none of them works.
+    """
+    available_encoders = get_ffmpeg_encoders()
+    for encoder in candidates:
+        if encoder not in available_encoders:
+            continue
+        res = subprocess.run(
+            [
+                "ffmpeg",
+                "-hide_banner",
+                "-loglevel",
+                "error",
+                "-f",
+                "lavfi",
+                "-i",
+                "color=size=256x256:duration=0.1",
+                "-frames:v",
+                "1",
+                "-c:v",
+                encoder,
+                "-f",
+                "null",
+                "-",
+            ],
+            capture_output=True,
+        )
+        if res.returncode == 0:
+            logger.debug(f"Hardware video encoder selected: {encoder}")
+            return encoder
+    return None
+
+
+def move_file(src: Path, dst: Path) -> Path:
+    """
+    Moves a file with a single rename when source and destination are on the same filesystem, and falls back
+    to shutil.move (copy and delete) only across filesystems.
+
+    :param src: Path of the file to move.
+    :param dst: Destination file path (not a directory); replaced if it exists.
+    :return: The destination path.
+    """
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src, dst)
+    return dst
+
+
 def format_timedelta(timedelta) -> str:
     """
     Formats a timedelta object into HH:MM:SS.
@@ -108,6 +225,38 @@ def detect_audio_language_multi_segments(
     :param temp_dir: Directory for temporary files.
     :return: Most common language detected.
     """
+    language_list = [
+        language
+        for language in detect_audio_language_segments_iter(
+            in_file, stream, segments, duration, temp_dir
+        )
+        if language is not None
+    ]
+    if not language_list:  # Every segment failed
+        return LANGUAGE_WORDS[0]
+    most_common_lang = collections.Counter(language_list).most_common(1)[0][0]
+    return most_common_lang
+
+
+def detect_audio_language_segments_iter(
+    in_file: Path,
+    stream: dict,
+    segments: int = 0,
+    duration: int = 0,
+    temp_dir: Path = Path(tempfile.gettempdir()),
+) -> Iterator[Optional[str]]:
+    """
+    Detects the language of an audio file segment by segment. Each segment is only analyzed when the next
+    language is requested, so a caller can stop after the first useful result. The segments closest to the
+    middle of the stream come first, since the start and end are the most likely to be music or credits.
+
+    :param in_file: Path to the input audio file.
+    :param stream: Dictionary with stream information.
+    :param segments: Number of segments to use for detection.
+    :param duration: Duration of the audio stream.
+    :param temp_dir: Directory for temporary files.
+    :return: Iterator over the language detected in each segment, None for a segment whose detection failed.
+    """
     stream_duration = duration or int(float(stream.get("duration", 0)))
 
     audio_duration = 30  # seconds per segment
@@ -115,7 +264,8 @@ def detect_audio_language_multi_segments(
     max_segment = 5
 
     if stream_duration < audio_duration * 2 + start_skip:
-        return LANGUAGE_WORDS[0]
+        yield LANGUAGE_WORDS[0]
+        return
 
     if segments == 0:  # auto-detect number of segments
         buffer = 3  # seconds buffer between segments
@@ -125,20 +275,31 @@ def detect_audio_language_multi_segments(
             )
         )
 
-    language_list = [
-        detect_audio_language_single(
+    start_seconds = [
+        start_skip
+        + int((stream_duration - start_skip - audio_duration) * i) // segments
+        for i in range(1, segments + 1)
+    ]
+    middle = stream_duration / 2
+    for start_second in sorted(start_seconds, key=lambda start: abs(start - middle)):
+        yield detect_audio_language_single(
             in_file,
             stream,
-            start_skip
-            + int((stream_duration - start_skip - audio_duration) * i) // segments,
+            start_second,
             duration=audio_duration,
             temp_dir=temp_dir,
         )
-        for i in range(1, segments + 1)
-    ]
 
-    most_common_lang = collections.Counter(language_list).most_common(1)[0][0]
-    return most_common_lang
+
+@functools.cache
+def get_whisper_model() -> WhisperModel:
+    """
+    Loads the Whisper model once per process. Loading large-v3 takes longer than detecting the language of
+    a segment, so the model is shared by all detections.
+
+    :return: The Whisper model.
+    """
+    return WhisperModel("large-v3", device="cuda", compute_type="float16")
 
 
 def detect_audio_language_single(
@@ -147,7 +308,7 @@ def detect_audio_language_single(
     start_second: int,
     duration: int,
     temp_dir: Path = Path(tempfile.gettempdir()),
-) -> str:
+) -> Optional[str]:
     """
     Detects the language of a single audio segment using Whisper.
 
@@ -156,7 +317,7 @@ def detect_audio_language_single(
     :param start_second: Start time in seconds for the segment.
     :param duration: Duration of the segment in seconds.
     :param temp_dir: Directory for temporary files.
-    :return: Detected language code (e.g., 'jp').
+    :return: Detected language code (e.g., 'jp'), or None if ffmpeg or Whisper failed.
     """
     map_index = int(stream.get("index", 0))
 
@@ -168,22 +329,35 @@ def detect_audio_language_single(
             max_bitrate = 192 * 1000
             abitrate = min(max_bitrate, int(float(stream.get("bit_rate", max_bitrate))))
 
-            cmd = (
-                f'ffmpeg -y -ss {int(start_second)} -t {int(duration)} -i "{in_file}" '
-                f'-c:a libmp3lame -b:a {abitrate} -map 0:{map_index} "{audio_file}"'
-            )
+            cmd = [
+                "ffmpeg",
+                "-y",
+                "-ss",
+                str(int(start_second)),
+                "-t",
+                str(int(duration)),
+                "-i",
+                str(in_file),
+                "-c:a",
+                "libmp3lame",
+                "-b:a",
+                str(abitrate),
+                "-map",
+                f"0:{map_index}",
+                str(audio_file),
+            ]
 
             res = run_cmd(cmd)
             if not res or res.returncode != 0:
                 logger.error(
                     f"Error generating audio file: {in_file}, return code: {res.returncode if res else 'N/A'}"
                 )
-                return LANGUAGE_WORDS[0]  # fallback to default language code
+                return None
 
-            model_size = "large-v3"
-            model = WhisperModel(model_size, device="cuda", compute_type="float16")
-            segments, info = model.transcribe(str(audio_file), beam_size=5)
+            segments, info = get_whisper_model().transcribe(
+                str(audio_file), beam_size=5
+            )
             return info.language
     except Exception as e:
         logger.error(f"Failed to detect language for file {in_file}: {e}")
-        return LANGUAGE_WORDS[0]
+        return None
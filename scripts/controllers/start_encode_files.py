@@ -1,18 +1,26 @@
 import argparse
 import concurrent.futures
+import itertools
+import multiprocessing
 import random
-import shutil
 import traceback
 from pathlib import Path
 
 from loguru import logger
 
+from scripts.controllers.functions import move_file
 from scripts.models.EncodeError import NoDurationFoundError
 from scripts.models.Encoder import VideoEncoder
 from scripts.models.Log import SuccessLog
 from scripts.models.MediaFile import MediaFile
+from scripts.models.PreEncoder import PreVideoEncoder, set_crf_search_semaphore
 from scripts.models.ProcessFiles import ProcessVideoFiles
-from scripts.settings.video import VIDEO_OUT_DIR_ROOT, NO_DURATION_FOUND_ERROR_DIR
+from scripts.settings.video import (
+    VIDEO_OUT_DIR_ROOT,
+    NO_DURATION_FOUND_ERROR_DIR,
+    MAX_PARALLEL_CRF_SEARCHES,
+    MANUAL_CRF,
+)
 
 
 def start_encode_video_files_multi_process(path: Path, args: argparse.Namespace = None):
@@ -33,10 +41,19 @@ def start_encode_video_files_multi_process(path: Path, args: argparse.Namespace
     logger.info(f"Remaining files to process: {len(process_files.files)}")
 
     try:
+        crf_search_semaphore = multiprocessing.BoundedSemaphore(
+            MAX_PARALLEL_CRF_SEARCHES
+        )
+        files_to_process = process_files.files
+        if args.pre_encode_workers and not args.manual_mode:
+            files_to_process = run_pre_encoders_parallel(
+                files_to_process, args, args.pre_encode_workers, crf_search_semaphore
+            )
         with concurrent.futures.ProcessPoolExecutor(
-            max_workers=args.processes
+            max_workers=args.processes,
+            initializer=set_crf_search_semaphore,
+            initargs=(crf_search_semaphore,),
         ) as executor:
-            files_to_process = process_files.files
             if args.random:
                 files_to_process = random.sample(
                     files_to_process, len(files_to_process)
@@ -67,6 +84,75 @@ def start_encode_video_files_multi_process(path: Path, args: argparse.Namespace
     pre_and_post_actions(process_files, path)
 
 
+def run_pre_encoders_parallel(
+    files: tuple[Path, ...],
+    args: argparse.Namespace,
+    max_workers: int,
+    crf_search_semaphore=None,
+) -> tuple[Path, ...]:
+    """
+    Runs the pre-encoding (skip checks and CRF search) of all files concurrently before encoding.
+    The CRF search results are saved as encode info, so the encoding phase resumes from them.
+
+    :param files: Paths of the video files to pre-encode.
+    :param args: Command-line arguments containing processing configurations.
+    :param max_workers: Maximum number of files pre-encoded at the same time.
+    :param crf_search_semaphore: Semaphore limiting the CRF searches running at once.
+    :return: Paths of the files that still need encoding.
+    """
+    logger.info(f"Pre-encoding {len(files)} files with {max_workers} workers")
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=set_crf_search_semaphore,
+        initargs=(crf_search_semaphore,),
+    ) as executor:
+        needs_encode = list(
+            executor.map(pre_encode_video_file, files, itertools.repeat(args))
+        )
+    return tuple(itertools.compress(files, needs_encode))
+
+
+def pre_encode_video_file(file_path: Path, args: argparse.Namespace) -> bool:
+    """
+    Pre-encodes a single video file and saves the selected encoder and CRF.
+
+    :param file_path: The path of the video file to pre-encode.
+    :param args: Command-line arguments containing processing configurations.
+    :return: False if the file was skipped or moved away, True if it still needs encoding.
+    """
+    try:
+        pre_encoder = PreVideoEncoder(
+            MediaFile(file_path), args.manual_mode, args.parallel_crf_search
+        )
+        pre_encoder.start()
+    except Exception as e:
+        # Left to the encoding phase, which handles and logs failures per file
+        logger.warning(f"Pre-encoding failed for {file_path}: {e}")
+        return True
+
+    if pre_encoder.renamed_file:
+        return False
+    if pre_encoder.encode_info.encoder:  # Resumed from the encode info of an earlier run
+        return True
+    if not (pre_encoder.best_encoder and pre_encoder.best_crf):
+        # No search result at all: decide on the manual fallback here, as a failed search does
+        pre_encoder.best_encoder = pre_encoder.best_encoder or pre_encoder.encoders[0]
+        pre_encoder.best_crf = MANUAL_CRF
+        pre_encoder.manual_mode = True
+    if pre_encoder.manual_mode:
+        logger.warning(
+            f"CRF search failed for {file_path}, encoding with {pre_encoder.best_encoder} at CRF {pre_encoder.best_crf}"
+        )
+    # Saved even for the manual fallback, so the encoding phase goes straight to it instead of
+    # repeating the failed search; resumed settings are always encoded in manual mode
+    pre_encoder.encode_info.dump(
+        encoder=pre_encoder.best_encoder,
+        crf=pre_encoder.best_crf,
+        ori_video_path=file_path.as_posix(),
+    )
+    return True
+
+
 def start_encode_video_file(file_path: Path, args: argparse.Namespace):
     """
     Encodes a single video file.
@@ -82,7 +168,7 @@ def start_encode_video_file(file_path: Path, args: argparse.Namespace):
     except NoDurationFoundError:  # raised by media_file initialization
         to_dir = NO_DURATION_FOUND_ERROR_DIR / file_path.relative_to(Path.cwd())
         to_dir.mkdir(parents=True, exist_ok=True)
-        shutil.move(file_path, to_dir)
+        move_file(file_path, to_dir / file_path.name)
         logger.error(f"Failed to find duration: {file_path}")
     except Exception as e:
         tb_str = traceback.format_exception(etype=type(e), value=e, tb=e.__traceback__)
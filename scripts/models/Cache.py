@@ -0,0 +1,182 @@
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+from loguru import logger
+
+from scripts.settings.common import CACHE_DB_FILE
+from scripts.settings.video import (
+    ENCODERS,
+    MAX_ENCODED_PERCENT,
+    NATIVE_CRF_RANGE,
+    NATIVE_CRF_SEARCH,
+    NATIVE_SAMPLE_COUNT,
+    NATIVE_SAMPLE_SECONDS,
+    SAMPLE_EVERY,
+    TARGET_VMAF,
+)
+
+
+class SQLiteCache:
+    """
+    Key-value cache table in a SQLite database shared by all processes and runs.
+
+    Subclasses set the table name and build their keys from whatever invalidates a cached value (such as the
+    source file's size and modification time). Values are stored as JSON. The database is opened in WAL mode,
+    so concurrent worker processes can read while one of them writes. Cache errors are logged and treated as
+    misses, so a broken or locked database never stops an encode.
+    """
+
+    table: str = ""
+    db_path: Path = CACHE_DB_FILE
+    _local = threading.local()  # One connection per thread and process; sqlite3 connections are not shareable
+
+    @classmethod
+    def _connection(cls) -> sqlite3.Connection:
+        connections = getattr(cls._local, "connections", None)
+        if connections is None or cls._local.pid != os.getpid():
+            connections = cls._local.connections = {}
+            cls._local.pid = os.getpid()
+        if cls.table not in connections:
+            cls.db_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(cls.db_path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {cls.table} (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            connections[cls.table] = connection
+        return connections[cls.table]
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """
+        Join the parts of a cache key into one string.
+        """
+        return "|".join(map(str, parts))
+
+    @classmethod
+    def get(cls, key: str) -> Optional[Any]:
+        """
+        Return the cached value of a key, or None if there is none.
+        """
+        try:
+            row = (
+                cls._connection()
+                .execute(f"SELECT value FROM {cls.table} WHERE key = ?", (key,))
+                .fetchone()
+            )
+            return json.loads(row[0]) if row else None
+        except (sqlite3.Error, OSError, ValueError) as e:  # Also an uncreatable directory or a corrupt value
+            logger.debug(f"Cache lookup failed ({cls.table}): {e}")
+            return None
+
+    @classmethod
+    def put(cls, key: str, value: Any):
+        """
+        Store the value of a key, replacing any earlier value.
+        """
+        try:
+            with cls._connection() as connection:
+                connection.execute(
+                    f"INSERT OR REPLACE INTO {cls.table} (key, value) VALUES (?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False)),
+                )
+        except (sqlite3.Error, OSError, TypeError, ValueError) as e:
+            logger.debug(f"Cache write failed ({cls.table}): {e}")
+
+
+class CRFSearchCache(SQLiteCache):
+    """
+    CRF search results per source file and encoder, so a file that is searched again (after an interruption,
+    or when it is retried) does not repeat minutes of sample encodes.
+    """
+
+    table = "crf_search"
+
+    @classmethod
+    def key_for(cls, path: Path, size: int, mtime_ns: int, encoder: str) -> str:
+        """
+        Return the cache key of a search: the file identity plus every setting that changes the result.
+        """
+        return cls.make_key(
+            Path(path).as_posix(),
+            size,
+            mtime_ns,
+            encoder,
+            SAMPLE_EVERY,
+            MAX_ENCODED_PERCENT,
+            TARGET_VMAF,
+            # The native search finds its CRF differently, so its results are kept apart from ab-av1's
+            NATIVE_CRF_SEARCH,
+            NATIVE_CRF_RANGE,
+            NATIVE_SAMPLE_COUNT,
+            NATIVE_SAMPLE_SECONDS,
+        )
+
+
+class CRFFingerprintCache(SQLiteCache):
+    """
+    Encoder, CRF and encoded ratio found for a source file, keyed by the file's characteristics instead of its
+    identity, so that similar files (such as episodes of a series) reuse the result found for the first of them.
+    """
+
+    table = "crf_fingerprint"
+
+    @classmethod
+    def key_for(cls, media_file) -> str:
+        """
+        Return the cache key of a media file: its rounded duration and bitrate, codec and resolution, plus the
+        encoders and CRF search settings, so that changing them invalidates the cached results.
+        """
+        video_stream = media_file.video_streams[0] if media_file.video_streams else {}
+        return cls.make_key(
+            round(media_file.duration),
+            media_file.vcodec,
+            round(media_file.vbitrate, -5),
+            video_stream.get("width"),
+            video_stream.get("height"),
+            ",".join(ENCODERS),
+            TARGET_VMAF,
+            MAX_ENCODED_PERCENT,
+            SAMPLE_EVERY,
+            NATIVE_CRF_SEARCH,
+            NATIVE_CRF_RANGE,
+            NATIVE_SAMPLE_COUNT,
+            NATIVE_SAMPLE_SECONDS,
+        )
+
+
+class MediaMetadataStore(SQLiteCache):
+    """
+    ffprobe results per source file, so files seen by an earlier run (or by the pre-encoding phase) are not
+    probed again. A changed file gets a new key from its size and modification time.
+    """
+
+    table = "media_metadata"
+
+    @classmethod
+    def key_for(cls, path: Path, size: int, mtime_ns: int) -> str:
+        """
+        Return the cache key of a file's probe data.
+        """
+        return cls.make_key(Path(path).as_posix(), size, mtime_ns)
+
+
+class LanguageDetectionCache(SQLiteCache):
+    """
+    Whisper language detections per audio stream, so streams without a language tag are transcribed only once
+    across runs.
+    """
+
+    table = "language_detection"
+
+    @classmethod
+    def key_for(cls, path: Path, size: int, mtime_ns: int, stream_index: int) -> str:
+        """
+        Return the cache key of an audio stream of a file.
+        """
+        return cls.make_key(Path(path).as_posix(), size, mtime_ns, stream_index)
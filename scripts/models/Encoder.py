@@ -1,17 +1,30 @@
+import functools
+import json
 import os
 import platform
 import shutil
+import time
 from datetime import datetime, timedelta
-from fractions import Fraction
 from pathlib import Path
 
 import yaml
 from loguru import logger
 
-from scripts.controllers.functions import format_timedelta, formatted_size, run_cmd
+try:
+    from yaml import CSafeDumper as SafeDumper
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeDumper
+
+from scripts.controllers.functions import (
+    format_timedelta,
+    formatted_size,
+    move_file,
+    run_cmd,
+    select_hw_video_encoder,
+)
 from scripts.models.EncodeError import SkippedVideoFileError
-from scripts.models.Log import ErrorLog, SuccessLog
-from scripts.models.MediaFile import MediaFile
+from scripts.models.Log import BufferedSuccessLog, ErrorLog, SuccessLog
+from scripts.models.MediaFile import MediaFile, parse_frame_rate
 from scripts.models.PreEncoder import PreVideoEncoder, PreEncoder
 from scripts.settings.audio import (
     DEFAULT_AUDIO_ENCODER,
@@ -20,7 +33,7 @@ from scripts.settings.audio import (
     AUDIO_ENCODED_RAW_DIR,
     AUDIO_COMMENT_ENCODED,
 )
-from scripts.settings.common import COMMAND_TEXT, BASE_ERROR_DIR
+from scripts.settings.common import COMMAND_TEXT, BASE_ERROR_DIR, FFMPEG_QUIET_OPTIONS
 from scripts.settings.video import (
     VIDEO_OUT_DIR_ROOT,
     AUDIO_OPUS_CODECS,
@@ -34,11 +47,36 @@ from scripts.settings.video import (
     MANUAL_VIDEO_BIT_RATE_IPHONE_XR,
     OUTPUT_DIR_IPHONE,
     MANUAL_AUDIO_BIT_RATE_IPHONE_XR,
-    IPHONE_XR_OPTIONS,
+    IPHONE_XR_OPTIONS_TOKENS,
     ENCODERS,
     MANUAL_CRF_INCREMENT_PERCENT,
+    USE_HW_ENCODER_IPHONE,
+    HW_VIDEO_CODECS_IPHONE,
+    HW_DECODE_OPTIONS,
+    LOW_LATENCY_OPTIONS,
+    NUM_NVENC_CHIPS,
+    MANUAL_FPS_IPHONE_XR,
+    MANUAL_HEIGHT_IPHONE_XR,
+    REMUX_CONTAINERS_IPHONE,
+    REMUX_VIDEO_CODECS_IPHONE,
+    REMUX_AUDIO_CODECS_IPHONE,
 )
 
+# Constant head of the iPhone metadata comment (compact JSON); only the per-file fields are serialized per encode
+_PHONE_COMMENT_PREFIX = '{"comment":' + json.dumps(VIDEO_COMMENT_ENCODED, ensure_ascii=False)
+
+
+@functools.cache
+def _resolve_dir(directory: str, cwd: str) -> Path:
+    """
+    Resolves a directory relative to the given working directory, once per process and working directory.
+
+    :param directory: Directory to resolve, usually relative.
+    :param cwd: Current working directory the directory is relative to.
+    :return: The resolved directory.
+    """
+    return Path(cwd, directory).resolve()
+
 
 class Encoder:
     """
@@ -72,6 +110,8 @@ class Encoder:
     renamed_original_file: Path
     success_log: SuccessLog
 
+    _created_dirs: set[Path] = set()  # Directories already created in this process
+
     def __init__(self, media_file: MediaFile, args):
         """
         Initializes the Encoder with a media file and encoding arguments.
@@ -80,17 +120,30 @@ class Encoder:
         :param args: Additional encoding arguments.
         """
         self.original_media_file = media_file
+        self.pre_encoder = None
         self.no_error = True
         self.error_dir = Path(BASE_ERROR_DIR).resolve()
         self.error_output_file = Path()
         self.error_log_file = Path()
         self.success_log_dir = Path.cwd()
         self.encoded_comment = ""
-        self.encode_cmd = ""
+        self.encode_cmd: list[str] = []
         self.encoded_raw_dir = Path()
         self.keep_mtime = True
         self.args = args
 
+    @classmethod
+    def _ensure_dir(cls, directory: Path):
+        """
+        Creates a directory once per process; later calls for the same directory are free.
+
+        :param directory: Directory to create.
+        """
+        directory = Path(directory)
+        if directory not in cls._created_dirs:
+            directory.mkdir(parents=True, exist_ok=True)
+            cls._created_dirs.add(directory)
+
     def start(self):
         """
         Starts the encoding process, including setup and invoking the encode method.
@@ -109,7 +162,7 @@ class Encoder:
         logger.info(
             f"Starting: {self.original_media_file.path.relative_to(Path.cwd())}"
         )
-        self.encoded_dir.mkdir(parents=True, exist_ok=True)
+        self._ensure_dir(self.encoded_dir)
         if self.pre_encoder:
             try:
                 self.pre_encoder.start()
@@ -162,7 +215,7 @@ class Encoder:
         if update_dic:
             log_dict.update(update_dic)
 
-        self.success_log = SuccessLog(self.success_log_dir, log_date=log_date)
+        self.success_log = BufferedSuccessLog.get(self.success_log_dir, log_date=log_date)
         self.success_log.write(log_dict)
 
     def encode(self):
@@ -175,12 +228,12 @@ class Encoder:
         """
         Moves the original media file to the encoded raw directory if specified.
         """
-        self.encoded_raw_dir.mkdir(parents=True, exist_ok=True)
+        self._ensure_dir(self.encoded_raw_dir)
         raw_file_path_target = self.encoded_raw_dir / self.original_media_file.filename
 
         if not raw_file_path_target.exists():
             try:
-                shutil.move(self.original_media_file.path, self.encoded_raw_dir)
+                move_file(self.original_media_file.path, raw_file_path_target)
             except shutil.Error as e:
                 logger.debug(e)
             except Exception as e:
@@ -249,11 +302,13 @@ class VideoEncoder(Encoder):
         )
         self.encoded_root_dir = VIDEO_OUT_DIR_ROOT
         self.error_dir = BASE_ERROR_DIR
-        self.pre_encoder = PreVideoEncoder(media_file, self.args.manual_mode)
+        self.pre_encoder = PreVideoEncoder(
+            media_file, self.args.manual_mode, self.args.parallel_crf_search
+        )
 
-        self.video_map_cmd = ""
-        self.audio_map_cmd = ""
-        self.subtitle_map_cmd = ""
+        self.video_map_cmd: list[str] = []
+        self.audio_map_cmd: list[str] = []
+        self.subtitle_map_cmd: list[str] = []
 
     def encode(self):
         """
@@ -305,13 +360,10 @@ class VideoEncoder(Encoder):
         if update_dic:
             comment_dic.update(update_dic)
 
-        self.encoded_comment = yaml.dump(
-            comment_dic,
-            default_flow_style=True,
-            sort_keys=False,
-            allow_unicode=True,
-            width=99999,
-        ).strip()
+        # Compact JSON is valid YAML flow style and is serialized by the C json encoder
+        self.encoded_comment = json.dumps(
+            comment_dic, ensure_ascii=False, separators=(",", ":")
+        )
 
     def ffmpeg_encode(self, update_dict: dict = None):
         """
@@ -326,12 +378,10 @@ class VideoEncoder(Encoder):
             self.no_error = True
             self.encoded_size = self.encoded_file.stat().st_size
             if self.keep_mtime:
+                # Source mtime was stat'ed once by MediaFile; nanoseconds avoid float conversion
                 os.utime(
                     self.encoded_file,
-                    times=(
-                        datetime.now().timestamp(),
-                        self.original_media_file.path.stat().st_mtime,
-                    ),
+                    ns=(time.time_ns(), self.original_media_file.mtime_ns),
                 )
             self.over_sized_actions()
             self.move_raw_file()
@@ -376,32 +426,31 @@ class VideoEncoder(Encoder):
         """
         Configures the video stream mapping command for ffmpeg based on pre-encoded video streams.
         """
-        _video_map_cmd = ""
+        _video_map_cmd = []
         max_fps = 240
         for video_stream in self.pre_encoder.output_video_streams:
             fps = "24"
             if "avg_frame_rate" in video_stream:
-                try:
-                    fps_fraction = Fraction(video_stream.get("avg_frame_rate"))
-                    if fps_fraction <= max_fps:
-                        fps = fps_fraction
-                except (ZeroDivisionError, Exception) as e:
-                    logger.error(e)
+                fps_fraction = parse_frame_rate(video_stream["avg_frame_rate"])
+                if fps_fraction is None:
+                    logger.error(f"Invalid avg_frame_rate: {video_stream['avg_frame_rate']}")
                     self.pre_encoder.output_video_streams.remove(video_stream)
                     logger.error("Removed faulty video stream.")
                     break
+                if fps_fraction <= max_fps:
+                    fps = fps_fraction
             else:
                 logger.warning(
                     f"avg_frame_rate not found in {self.original_media_file.path}"
                 )
-            _video_map_cmd += f'-map 0:{int(video_stream.get("index"))} -r "{fps}" '
+            _video_map_cmd += ["-map", f'0:{int(video_stream.get("index"))}', "-r", str(fps)]
         self.video_map_cmd = _video_map_cmd
 
     def set_audio_map_cmd(self):
         """
         Configures the audio stream mapping command for ffmpeg based on pre-encoded audio streams.
         """
-        _audio_map_cmd = ""
+        _audio_map_cmd = []
         audio_index = 0
         for audio_stream in self.pre_encoder.output_audio_streams:
             stream_index = int(audio_stream.get("index"))
@@ -421,16 +470,19 @@ class VideoEncoder(Encoder):
                         abitrate = min(int(audio_stream.get("BPS-eng")), max_bitrate)
                     else:
                         abitrate = max_bitrate
-                    _audio_map_cmd += (
-                        f"-map 0:{stream_index} "
-                        f"-b:a:{audio_index} {abitrate} "
-                        f"-c:a:{audio_index} {acodec} "
-                    )
+                    _audio_map_cmd += [
+                        "-map",
+                        f"0:{stream_index}",
+                        f"-b:a:{audio_index}",
+                        str(abitrate),
+                        f"-c:a:{audio_index}",
+                        acodec,
+                    ]
                     self.encoded_file = self.encoded_file.with_suffix(".mkv")
                     break
             else:
                 acodec = "copy"
-                _audio_map_cmd += f"-map 0:{stream_index} -c:a:{audio_index} {acodec} "
+                _audio_map_cmd += ["-map", f"0:{stream_index}", f"-c:a:{audio_index}", acodec]
             audio_index += 1
         self.audio_map_cmd = _audio_map_cmd
 
@@ -438,7 +490,7 @@ class VideoEncoder(Encoder):
         """
         Configures the subtitle stream mapping command for ffmpeg based on pre-encoded subtitle streams.
         """
-        _subtitle_map_cmd = ""
+        _subtitle_map_cmd = []
         if not self.pre_encoder.output_subtitle_streams:
             return _subtitle_map_cmd
 
@@ -451,9 +503,7 @@ class VideoEncoder(Encoder):
                     scodec = "copy"
                     self.encoded_file = self.encoded_file.with_suffix(".mkv")
                     break
-            _subtitle_map_cmd += (
-                f"-map 0:{stream_index} -c:s:{subtitle_index} {scodec} "
-            )
+            _subtitle_map_cmd += ["-map", f"0:{stream_index}", f"-c:s:{subtitle_index}", scodec]
             subtitle_index += 1
         self.subtitle_map_cmd = _subtitle_map_cmd
 
@@ -462,11 +512,23 @@ class VideoEncoder(Encoder):
         Constructs the ffmpeg command for encoding based on current settings and options.
         """
         self.set_encoded_comment()
-        self.encode_cmd = (
-            f'ffmpeg -y -i "{self.original_media_file.path}" -c:v "{self.encoder}" '
-            f'-crf {self.crf} {self.video_map_cmd} -metadata comment="{self.encoded_comment}" '
-            f'{self.audio_map_cmd} {self.subtitle_map_cmd} "{self.encoded_file}"'
-        )
+        # An argument list needs no quoting, so the comment is passed as is
+        self.encode_cmd = [
+            "ffmpeg",
+            "-y",
+            "-i",
+            str(self.original_media_file.path),
+            "-c:v",
+            self.encoder,
+            "-crf",
+            str(self.crf),
+            *self.video_map_cmd,
+            "-metadata",
+            f"comment={self.encoded_comment}",
+            *self.audio_map_cmd,
+            *self.subtitle_map_cmd,
+            str(self.encoded_file),
+        ]
 
     def failed_action(self, res):
         """
@@ -483,15 +545,15 @@ class VideoEncoder(Encoder):
             str(res.returncode) / self.original_media_file.relative_dir
         )
         self.error_dir.mkdir(parents=True, exist_ok=True)
-        error_log = ErrorLog(self.error_dir)
-        error_log.write(
-            self.original_media_file.path,
-            str(self.original_media_file.probe),
-            res.stdout,
-            res.stderr,
-        )
-        shutil.move(self.original_media_file.path, self.error_dir)
+        with ErrorLog(self.error_dir) as error_log:
+            error_log.write(
+                self.original_media_file.path,
+                str(self.original_media_file.probe),
+                res.stdout,
+                res.stderr,
+            )
         self.error_output_file = self.error_dir / self.original_media_file.filename
+        move_file(self.original_media_file.path, self.error_output_file)
         self.encoded_file.unlink()
 
     def write_success_log(self, log_date=True, update_dic: dict = None):
@@ -527,6 +589,19 @@ class PhoneVideoEncoder(Encoder):
     Inherits from Encoder and configures settings for encoding videos compatible with iPhone.
     """
 
+    # Audio codec and bitrates are the same for every file, so their arguments are built once
+    _RATE_ARGS: tuple[str, ...] = (
+        "-acodec",
+        AUDIO_CODEC_IPHONE_XR,
+        "-b:v",
+        str(MANUAL_VIDEO_BIT_RATE_IPHONE_XR),
+        "-b:a",
+        str(MANUAL_AUDIO_BIT_RATE_IPHONE_XR),
+    )
+
+    # Index of the worker process running this encoder, set by the process pool initializer
+    worker_id: int = 0
+
     def __init__(self, media_file: MediaFile = None, args=None):
         """
         Initializes the PhoneVideoEncoder with specific paths and settings for iPhone video encoding.
@@ -535,10 +610,70 @@ class PhoneVideoEncoder(Encoder):
         :param args: Additional arguments for encoding.
         """
         super().__init__(media_file, args=args)
-        self.encoded_dir = os.path.abspath(OUTPUT_DIR_IPHONE)
-        self.encoder = VIDEO_CODEC_IPHONE_XR
-        self.cmd_options = IPHONE_XR_OPTIONS
-        self.success_log_dir = os.getcwd()
+        cwd = os.getcwd()
+        # Resolved once per process; keyed on the working directory since the output dir is relative to it
+        self.encoded_dir = _resolve_dir(
+            OUTPUT_DIR_IPHONE, cwd
+        ) / self.original_media_file.path.parent.relative_to(cwd)
+        self.cmd_options = IPHONE_XR_OPTIONS_TOKENS
+        self.remux = not self._needs_reencode()
+        if self.remux:
+            self.encoder = "copy"
+            self._codec_args: tuple[str, ...] = ("-c", "copy")
+        else:
+            self.encoder = (
+                USE_HW_ENCODER_IPHONE and select_hw_video_encoder(HW_VIDEO_CODECS_IPHONE)
+            ) or VIDEO_CODEC_IPHONE_XR
+            self._codec_args = (
+                *self.cmd_options,
+                "-vcodec",
+                self.encoder,
+                *LOW_LATENCY_OPTIONS.get(self.encoder, ()),
+                *self._gpu_args(),
+                *self._RATE_ARGS,
+            )
+        self.success_log_dir = cwd
+        # Written to the output directory, so an MP4 source is never overwritten by its own output
+        self.encoded_file = self.encoded_dir / f"{self.original_media_file.path.stem}.mp4"
+        # Resolve both paths once, encode() only needs their string forms
+        self._resolved_src = self.original_media_file.path.resolve().as_posix()
+        self._resolved_dst = str(self.encoded_file.resolve())
+
+    def _needs_reencode(self) -> bool:
+        """
+        Checks whether the source has to be encoded, or already fits the iPhone profile and can be remuxed.
+
+        :return: False if the streams can be copied as they are.
+        """
+        media_file = self.original_media_file
+        if media_file.path.suffix.lower() not in REMUX_CONTAINERS_IPHONE or len(media_file.video_streams) != 1:
+            return True
+        video_stream = media_file.video_streams[0]
+        fps = parse_frame_rate(video_stream.get("avg_frame_rate"))
+        if fps is None:
+            return True
+        if (
+            media_file.vcodec not in REMUX_VIDEO_CODECS_IPHONE
+            or int(video_stream.get("height", 0)) > MANUAL_HEIGHT_IPHONE_XR
+            or fps > MANUAL_FPS_IPHONE_XR
+            or media_file.vbitrate > MANUAL_VIDEO_BIT_RATE_IPHONE_XR
+        ):
+            return True
+        # An audio stream without a known bitrate cannot be checked against the profile, so it is re-encoded
+        return any(
+            audio_stream.get("codec_name") not in REMUX_AUDIO_CODECS_IPHONE
+            or not str(audio_stream.get("bit_rate", "")).isdigit()
+            or int(audio_stream["bit_rate"]) > MANUAL_AUDIO_BIT_RATE_IPHONE_XR
+            for audio_stream in media_file.audio_streams
+        )
+
+    def _gpu_args(self) -> tuple[str, ...]:
+        """
+        Returns the NVENC engine selection of this worker, so concurrent workers use different engines.
+        """
+        if NUM_NVENC_CHIPS > 1 and self.encoder.endswith("_nvenc"):
+            return "-gpu", str(self.worker_id % NUM_NVENC_CHIPS)
+        return ()
 
     def write_success_log(self, log_date=False, update_dic: dict = None):
         """
@@ -561,34 +696,85 @@ class PhoneVideoEncoder(Encoder):
         """
         Sets the metadata comment for the iPhone encoded video.
         """
-        comment_dic = {
-            "comment": VIDEO_COMMENT_ENCODED,
-            "source file": self.original_media_file.filename,
-            "source file size": formatted_size(self.original_media_file.size),
-        }
-        self.encoded_comment = yaml.dump(
-            comment_dic,
-            default_flow_style=True,
-            sort_keys=False,
-            allow_unicode=True,
-            width=99999,
+        # JSON is valid YAML flow style, so the comment stays readable by yaml loaders
+        self.encoded_comment = (
+            f"{_PHONE_COMMENT_PREFIX}"
+            f',"source file":{json.dumps(self.original_media_file.filename, ensure_ascii=False)}'
+            f',"source file size":{json.dumps(formatted_size(self.original_media_file.size))}}}'
         )
 
-    def encode(self):
+    def _prepare_encode(self):
         """
-        Starts the encoding process for iPhone videos. Sets the appropriate encoding command and handles errors.
+        Sets the metadata comment and makes sure the output directory exists.
         """
         self.set_encoded_comment()
-        self.encoded_file = self.original_media_file.path.with_suffix(".mp4")
-        os.makedirs(self.encoded_dir, exist_ok=True)
-        self.encode_cmd = (
-            f'ffmpeg -y -i "{self.original_media_file.path.as_posix()}" '
-            f"{self.cmd_options}"
-            f"-vcodec {VIDEO_CODEC_IPHONE_XR} -acodec {AUDIO_CODEC_IPHONE_XR} "
-            f"-b:v {MANUAL_VIDEO_BIT_RATE_IPHONE_XR} -b:a {MANUAL_AUDIO_BIT_RATE_IPHONE_XR} "
-            f'-metadata comment="{self.encoded_comment}" '
-            f'"{self.encoded_file}"'
+        self._ensure_dir(self.encoded_dir)
+
+    def _input_args(self) -> list[str]:
+        """
+        Returns the ffmpeg input arguments of this file.
+        """
+        return [*HW_DECODE_OPTIONS.get(self.encoder, ()), "-i", self._resolved_src]
+
+    def _map_args(self, input_index: int = 0) -> tuple[str, ...]:
+        """
+        Returns the stream selection of this file: its first video stream and one audio stream, the default one
+        or else the one with the most channels, as ffmpeg picks it for a single input. Single and batch encodes
+        both map the streams explicitly, so a file gets the same audio track either way.
+
+        :param input_index: Index of this file's input in the ffmpeg command.
+        """
+        map_args = ("-map", f"{input_index}:v:0")
+        audio_streams = self.original_media_file.audio_streams
+        if not audio_streams:
+            return map_args
+        audio_stream = max(
+            audio_streams,
+            key=lambda stream: (
+                stream.get("disposition", {}).get("default", 0),
+                int(stream.get("channels", 0)),
+            ),
         )
+        return *map_args, "-map", f"{input_index}:{audio_stream['index']}"
+
+    def _output_args(self, input_index: int = 0) -> list[str]:
+        """
+        Returns the ffmpeg output arguments of this file.
+
+        :param input_index: Index of this file's input in the ffmpeg command.
+        """
+        return [
+            *self._map_args(input_index),
+            *self._codec_args,
+            "-metadata",
+            f"comment={self.encoded_comment}",
+            self._resolved_dst,
+        ]
+
+    def _success_action(self):
+        """
+        Updates the encoded file's mtime and size after a successful encode.
+        """
+        self.no_error = True
+        if self.keep_mtime:
+            os.utime(
+                self.encoded_file,
+                ns=(time.time_ns(), self.original_media_file.mtime_ns),
+            )
+        self.encoded_size = os.stat(self.encoded_file).st_size
+
+    def encode(self):
+        """
+        Starts the encoding process for iPhone videos. Sets the appropriate encoding command and handles errors.
+        """
+        self._prepare_encode()
+        self.encode_cmd = [
+            "ffmpeg",
+            "-y",
+            *FFMPEG_QUIET_OPTIONS,
+            *self._input_args(),
+            *self._output_args(),
+        ]
 
         show_cmd = __debug__
 
@@ -599,19 +785,71 @@ class PhoneVideoEncoder(Encoder):
             cmd_path=cmd_path,
         )
         if res.returncode == 0:
-            self.no_error = True
-            if self.keep_mtime:
-                os.utime(
-                    self.encoded_file,
-                    (
-                        datetime.now().timestamp(),
-                        os.path.getmtime(self.original_media_file.path),
-                    ),
-                )
-            self.encoded_size = os.path.getsize(self.encoded_file)
+            self._success_action()
         else:
             self.failed_action(res)
 
+    @classmethod
+    def encode_batch(cls, encoders: list["PhoneVideoEncoder"]) -> bool:
+        """
+        Encodes several files with a single ffmpeg process (one input and one output per file),
+        so the encoder is initialized once for the whole batch instead of once per file.
+
+        :param encoders: Encoders of the files to encode together.
+        :return: True if ffmpeg succeeded for the whole batch.
+        """
+        encode_cmd = ["ffmpeg", "-y", *FFMPEG_QUIET_OPTIONS]
+        for encoder in encoders:
+            encoder._prepare_encode()
+            encode_cmd.extend(encoder._input_args())
+        for input_index, encoder in enumerate(encoders):
+            encode_cmd.extend(encoder._output_args(input_index))
+
+        res = run_cmd(
+            encode_cmd,
+            show_cmd=__debug__,
+            cmd_path=encoders[0].encoded_dir / COMMAND_TEXT,
+        )
+        if not res or res.returncode != 0:
+            return False
+        for encoder in encoders:
+            encoder.encode_cmd = encode_cmd
+            encoder._success_action()
+        return True
+
+    @classmethod
+    def start_batch(cls, encoders: list["PhoneVideoEncoder"]):
+        """
+        Encodes several files as one ffmpeg batch and logs each of them. If the batch fails, the files
+        are encoded one by one so that failures are handled per file.
+
+        :param encoders: Encoders of the files to encode together.
+        """
+        if len(encoders) == 1:
+            encoders[0].start()
+            return
+
+        encode_start_datetime = datetime.now()
+        if not cls.encode_batch(encoders):
+            logger.warning(
+                f"Batch encoding of {len(encoders)} files failed, encoding them one by one."
+            )
+            for encoder in encoders:
+                try:
+                    encoder.start()
+                except Exception as e:
+                    logger.error(f"Failed to encode {encoder.original_media_file.path}: {e}")
+            return
+        encode_end_datetime = datetime.now()
+
+        for encoder in encoders:
+            # The files share one ffmpeg run, so they share its timing
+            encoder.encode_start_datetime = encode_start_datetime
+            encoder.encode_end_datetime = encode_end_datetime
+            encoder.total_time = encode_end_datetime - encode_start_datetime
+            encoder.write_success_log()
+            encoder.post_actions()
+
 
 class AudioEncoder(Encoder):
     """
@@ -682,6 +920,7 @@ class AudioEncoder(Encoder):
         }
         self.encoded_comment = yaml.dump(
             comment_dic,
+            Dumper=SafeDumper,
             default_flow_style=True,
             sort_keys=False,
             allow_unicode=True,
@@ -696,13 +935,19 @@ class AudioEncoder(Encoder):
         and handles errors if the encoding fails.
         """
         self.set_encoded_comment()
-        self.encode_cmd = (
-            f'ffmpeg -y -i "{self.original_media_file.path}" '
-            f"-acodec {self.encoder} "
-            f"-b:a {self.target_bit_rate} "
-            f'-metadata comment="{self.encoded_comment}" '
-            f'"{self.encoded_file}"'
-        )
+        self.encode_cmd = [
+            "ffmpeg",
+            "-y",
+            "-i",
+            str(self.original_media_file.path),
+            "-acodec",
+            self.encoder,
+            "-b:a",
+            str(self.target_bit_rate),
+            "-metadata",
+            f"comment={self.encoded_comment}",
+            str(self.encoded_file),
+        ]
         show_cmd = __debug__
         cmd_path = self.encoded_dir / COMMAND_TEXT
         res = run_cmd(
@@ -715,12 +960,9 @@ class AudioEncoder(Encoder):
             if self.keep_mtime:
                 os.utime(
                     self.encoded_file,
-                    (
-                        datetime.now().timestamp(),
-                        os.path.getmtime(self.original_media_file.path),
-                    ),
+                    ns=(time.time_ns(), self.original_media_file.mtime_ns),
                 )
-            self.encoded_size = os.path.getsize(self.encoded_file)
+            self.encoded_size = os.stat(self.encoded_file).st_size
         else:
             self.failed_action(res)
 
@@ -740,16 +982,14 @@ class AudioEncoder(Encoder):
                 BASE_ERROR_DIR / str(res.returncode) / self.original_media_file.relative_dir
         )
         error_dir.mkdir(parents=True, exist_ok=True)
-        error_log = ErrorLog(error_dir)
-        error_log.write(
-            self.original_media_file.path,
-            str(self.original_media_file.probe),
-            res.stdout,
-            res.stderr,
-        )
+        with ErrorLog(error_dir) as error_log:
+            error_log.write(
+                self.original_media_file.path,
+                str(self.original_media_file.probe),
+                res.stdout,
+                res.stderr,
+            )
         # Move original file to the error directory
-        shutil.move(str(self.original_media_file.path), error_dir)
-        self.error_output_file = os.path.join(
-            error_dir, self.original_media_file.filename
-        )
+        self.error_output_file = error_dir / self.original_media_file.filename
+        move_file(self.original_media_file.path, self.error_output_file)
         os.remove(self.encoded_file)
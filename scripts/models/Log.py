@@ -1,20 +1,192 @@
+import base64
+import concurrent.futures
+import contextlib
+import heapq
+import json
+import mmap
+import multiprocessing.util
+import operator
 import os
-import random
-import re
-import string
+import queue
+import sys
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
+from typing import Iterator, Optional
 
 import yaml
 from loguru import logger
 
+try:
+    from yaml import CSafeDumper as SafeDumper, CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeDumper, SafeLoader
+
 from scripts.settings.common import (
     COMPLETED_LOG_FILE_NAME,
+    COMBINED_LOG_WRITE_BUFFER,
     SUCCESS_LOG_RANDOM_LENGTH,
     DEFAULT_SUCCESS_LOG_YAML,
+    SUCCESS_LOG_FLUSH_EVERY,
+    SUCCESS_LOG_FLUSH_INTERVAL,
 )
 
 
+class _InterningSafeLoader(SafeLoader):
+    """
+    SafeLoader that interns the mapping keys. Every log entry repeats the same keys, so loaded
+    entries share one string per key instead of allocating a new one per entry.
+    """
+
+    def construct_mapping(self, node, deep=False):
+        mapping = super().construct_mapping(node, deep=deep)
+        return {
+            sys.intern(key) if type(key) is str else key: value
+            for key, value in mapping.items()
+        }
+
+
+def _get_log_date(log_file_name: str) -> Optional[str]:
+    """
+    Extract the date from a per-process log file name (log_YYYYMMDD_XXXXXXXXXX.jsonl).
+
+    Args:
+        log_file_name (str): Name of the log file.
+
+    Returns:
+        Optional[str]: The YYYYMMDD date, or None if the name does not follow the schema.
+    """
+    if (
+        log_file_name.startswith("log_")
+        and len(log_file_name) > 12
+        and log_file_name[12] == "_"
+        and log_file_name[4:12].isdigit()
+    ):
+        return log_file_name[4:12]
+    return None
+
+
+def _iter_log_files(root: str) -> Iterator[tuple[str, str]]:
+    """
+    Recursively yield the success log files (log_YYYYMMDD*.yaml / .jsonl) under a directory.
+
+    Uses a single os.scandir walk so that daily and per-process logs are discovered together.
+    Paths stay plain strings (the directory interned, as it repeats for every file in it);
+    Path objects are only built for the files that are actually opened.
+
+    Args:
+        root (str): Directory to scan.
+
+    Yields:
+        tuple[str, str]: Directory and file name of each success log file found.
+    """
+    root = sys.intern(root)
+    try:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                name = entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    yield from _iter_log_files(entry.path)
+                elif (
+                    name.startswith("log_")
+                    and name.endswith((".yaml", ".jsonl"))
+                    and len(name) >= 17
+                    and name[4:12].isdigit()
+                ):
+                    yield root, name
+    except OSError as e:
+        logger.error(f"Cannot scan {root}: {e}")
+
+
+def _load_log_entries(log_file: Path) -> list:
+    """
+    Load the entries of a success log. Per-process logs are JSON Lines (one entry per line),
+    daily and legacy per-process logs are YAML.
+
+    Args:
+        log_file (Path): Path of the log file.
+
+    Returns:
+        list: Entries stored in the log file.
+    """
+    if log_file.suffix == ".jsonl":
+        with log_file.open("r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    if log_file.stat().st_size == 0:
+        return []
+    # Parse straight from a read-only memory map instead of reading the file into a str
+    with log_file.open("rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mapped_file:
+        return yaml.load(mapped_file, Loader=_InterningSafeLoader) or []
+
+
+def _merge_daily_log(job: tuple[str, str, list[str]]) -> Path:
+    """
+    Merge the per-process logs of one folder and date into its daily log (log_YYYYMMDD.yaml).
+
+    Defined at module level so it can be run in a process pool. The per-process logs are left in place;
+    the caller removes them once the merge has succeeded.
+
+    Args:
+        job (tuple[str, str, list[str]]): Log directory, date and names of the per-process logs to merge.
+
+    Returns:
+        Path: Path of the written daily log.
+    """
+    log_dir, date, log_file_names = job
+    daily_log_file = Path(log_dir, f"log_{date}.yaml")
+    date_contents = []
+    for log_file_name in log_file_names:
+        date_contents.extend(_load_log_entries(Path(log_dir, log_file_name)))
+    # Daily logs are block sequences, so new items are appended without reading the existing log.
+    # A missing or empty ('[]') daily log is written afresh instead.
+    try:
+        append = daily_log_file.stat().st_size > len("[]\n")
+    except FileNotFoundError:
+        append = False
+    if append and not date_contents:
+        return daily_log_file
+    # yaml.dump without a stream emits into an in-memory buffer, so the file is written in one call
+    with daily_log_file.open("ab" if append else "wb") as f:
+        f.write(
+            yaml.dump(
+                date_contents,
+                Dumper=SafeDumper,
+                default_flow_style=False,
+                sort_keys=False,
+                encoding="utf-8",
+                allow_unicode=True,
+                indent=4,
+                width=220,
+            )
+        )
+    return daily_log_file
+
+
+def _load_sorted_daily_log(daily_log_file: Path) -> tuple[list[dict], int]:
+    """
+    Load a daily log and sort its entries by 'ended time'.
+
+    Defined at module level so it can be run in a process pool. SuccessLog.write always sets
+    'ended time', so entries without it (or that are not mappings) are malformed legacy entries and dropped.
+
+    Args:
+        daily_log_file (Path): Path of the daily log.
+
+    Returns:
+        tuple[list[dict], int]: The sorted entries and the number of dropped entries.
+    """
+    entries = _load_log_entries(daily_log_file)
+    valid_entries = [
+        entry for entry in entries if type(entry) is dict and "ended time" in entry
+    ]
+    valid_entries.sort(key=operator.itemgetter("ended time"))
+    return valid_entries, len(entries) - len(valid_entries)
+
+
 class Log:
     """
     Base class for handling logging operations. Provides utility functions and attributes
@@ -52,7 +224,7 @@ class Log:
     @classmethod
     def generate_random_string(cls, length: int = SUCCESS_LOG_RANDOM_LENGTH) -> str:
         """
-        Generate a random string of uppercase letters and digits.
+        Generate a random string of uppercase letters and digits (base32 of os.urandom bytes).
 
         Args:
             length (int): Length of the random string to generate.
@@ -60,13 +232,16 @@ class Log:
         Returns:
             str: Generated random string.
         """
-        return "".join(random.choices(string.ascii_uppercase + string.digits, k=length))
+        return base64.b32encode(os.urandom((length * 5 + 7) // 8)).decode()[:length]
 
 
 class ErrorLog(Log):
     """
     Class for handling error logging. Inherits from Log and provides implementation
     for writing error messages to a file.
+
+    The log file is opened on the first write and kept open until close() is called,
+    so it is best used as a context manager.
     """
 
     def __init__(self, path: Path):
@@ -79,6 +254,17 @@ class ErrorLog(Log):
         super().__init__(path)
         if not self.file:
             self.file = self.dir / "error.txt"
+        self._entry_suffix = "\n" + self.linesep + "\n"
+        self._file_handle = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        self.close()
 
     def write(self, *args):
         """
@@ -87,9 +273,18 @@ class ErrorLog(Log):
         Args:
             *args: Variable length argument list for error messages to be logged.
         """
-        contents = "\n".join(args) + "\n" + self.linesep
-        with self.file.open("a", encoding="utf-8") as f:
-            f.write(contents)
+        if self._file_handle is None:
+            self._file_handle = self.file.open("a", encoding="utf-8", buffering=65536)
+        self._file_handle.write("\n".join(map(str, args)))
+        self._file_handle.write(self._entry_suffix)
+
+    def close(self):
+        """
+        Flush and close the log file if it is open.
+        """
+        if getattr(self, "_file_handle", None) is not None:
+            self._file_handle.close()
+            self._file_handle = None
 
 
 class SuccessLog(Log):
@@ -98,6 +293,20 @@ class SuccessLog(Log):
     for writing and combining success logs.
     """
 
+    # Serializes writes to the undated log, which all workers share; see set_undated_log_lock()
+    _undated_log_lock = threading.Lock()
+
+    @classmethod
+    def set_undated_log_lock(cls, lock):
+        """
+        Set the lock that serializes writes to the undated log. Used from a process pool initializer,
+        since multiprocessing locks can only be handed to workers when they start.
+
+        Args:
+            lock: A multiprocessing.Lock shared by all workers.
+        """
+        cls._undated_log_lock = lock
+
     def __init__(self, path: Path, log_date: bool = True):
         """
         Initialize the SuccessLog instance, setting the file name with or without a date prefix.
@@ -108,113 +317,342 @@ class SuccessLog(Log):
         """
         super().__init__(path)
         self.file_name = (
-            f"log_{datetime.now().strftime('%Y%m%d')}_{self.generate_random_string()}.yaml"
+            f"log_{datetime.now().strftime('%Y%m%d')}_{self.generate_random_string()}.jsonl"
             if log_date
             else DEFAULT_SUCCESS_LOG_YAML
         )
         self.file = self.dir / self.file_name
-        self.contents = []
+        self._next_index: int = 1  # Next index of the dated log, which only this process writes
+
+    def _count_entries(self) -> int:
+        """
+        Count the entries of the undated YAML log. Every top-level item of the block sequence starts
+        its own line with '-', so the file is scanned line by line instead of being parsed.
+
+        Returns:
+            int: Number of entries in the log, 0 if it does not exist yet.
+        """
+        try:
+            with self.file.open("rb") as f:
+                return sum(1 for line in f if line.startswith(b"-"))
+        except FileNotFoundError:
+            return 0
 
     def write(self, log_dic: dict = None):
         """
-        Write the log dictionary to the success log file. Updates existing logs or creates new logs if necessary.
+        Write the log dictionary to the success log file.
 
         Args:
             log_dic (dict): Dictionary containing success log data.
         """
-        if self.file.is_file():
-            with self.file.open("r", encoding="utf-8") as f:
-                try:
-                    self.contents = yaml.full_load(f) or []
-                except yaml.constructor.ConstructorError:
-                    os.remove(f)
-
-        index = len(self.contents) + 1
-        log_dic.update({"index": index})
-        self.contents.append(log_dic)
-        with self.file.open("w", encoding="utf-8") as f:
-            yaml.dump(
-                self.contents,
-                f,
-                default_flow_style=False,
-                sort_keys=False,
-                encoding="utf-8",
-                allow_unicode=True,
-                indent=4,
-                width=220,
-            )
+        self.write_entries([log_dic])
 
-    @classmethod
-    def generate_combined_log_yaml(cls, pardir: Path = None):
+    def write_entries(self, log_dics: list[dict]):
         """
-        Combine all success logs in a directory into a single YAML file, sorted by 'ended time'.
+        Write log dictionaries to the success log file. Dated (per-process) logs are JSON Lines and
+        only get the new entries appended; the undated YAML log is shared by the worker processes, so its
+        next index is counted from the file under the undated log lock before the entries are appended.
 
         Args:
-            pardir (Path): Parent directory containing log files to be combined.
+            log_dics (list[dict]): Dictionaries containing success log data.
         """
-
-        def combine_yaml_in_single_folder(dirs: set[Path]):
-            """
-            Combine YAML files in the given directories, grouping by date.
-
-            Args:
-                dirs (set[Path]): Set of directories containing YAML files to be combined.
-            """
-            for _dir in dirs:
-                # Extract unique dates from log file names
-                dates = {
-                    re.search(r"2[0-9]{7}", _log_file.name).group(0)
-                    for _log_file in _dir.glob("log_*.yaml")
-                }
-                for date in dates:
-                    _contents = []
-                    same_date_log_files = {
-                        _f for _f in _dir.glob("log_*.yaml") if date in _f.name
-                    }
-                    for same_date_log_file in same_date_log_files:
-                        with same_date_log_file.open("r", encoding="utf-8") as _f:
-                            _contents.extend(yaml.full_load(_f) or [])
-                        same_date_log_file.unlink()  # Remove individual log file after reading
-                    with (_dir / f"log_{date}.yaml").open("w", encoding="utf-8") as _f:
-                        yaml.dump(
-                            _contents,
-                            _f,
-                            default_flow_style=False,
+        if not log_dics:
+            return
+        ended_time = datetime.now().strftime("%Y%m%d_%H:%M:%S")
+        for log_dic in log_dics:
+            # Every entry must carry 'ended time', the sort key of the combined log
+            log_dic.setdefault("ended time", ended_time)
+
+        if self.file.suffix == ".jsonl":
+            for log_dic in log_dics:
+                log_dic.update({"index": self._next_index})
+                self._next_index += 1
+            with self.file.open("a", encoding="utf-8") as f:
+                f.write(
+                    "".join(
+                        json.dumps(log_dic, ensure_ascii=False) + "\n" for log_dic in log_dics
+                    )
+                )
+            return
+
+        # The log is a block sequence, so appending the new items keeps it a valid YAML list.
+        # A missing or empty log (possibly '[]') is started afresh instead. Each entry is emitted as a
+        # single flow-style '- {...}' line, which is cheaper to emit and parse than an indented block.
+        with self._undated_log_lock:
+            entry_count = self._count_entries()
+            for index, log_dic in enumerate(log_dics, start=entry_count + 1):
+                log_dic.update({"index": index})
+            with self.file.open("ab" if entry_count else "wb") as f:
+                f.write(
+                    b"".join(
+                        b"- "
+                        + yaml.dump(
+                            log_dic,
+                            Dumper=SafeDumper,
+                            default_flow_style=True,
                             sort_keys=False,
                             encoding="utf-8",
                             allow_unicode=True,
-                            indent=4,
-                            width=220,
+                            width=99999,
                         )
+                        for log_dic in log_dics
+                    )
+                )
+
+    @classmethod
+    def generate_combined_log_yaml(cls, pardir: Path = None):
+        """
+        Combine all success logs in a directory into a single YAML file, sorted by 'ended time'.
 
+        Phase 1 merges the per-process logs (log_YYYYMMDD_XXXXXXXXXX.jsonl) of each folder into
+        its daily log (log_YYYYMMDD.yaml). Phase 2 rebuilds the combined log from all daily logs.
+
+        Args:
+            pardir (Path): Parent directory containing log files to be combined.
+        """
+        BufferedSuccessLog.flush_all()
         combined_log_file = Path(pardir) / COMPLETED_LOG_FILE_NAME
-        contents = []
-        log_dirs = set()
-
-        # Collect all logs and directories
-        log_files = set(Path(pardir).rglob("log_*.yaml"))
-        for log_file in log_files:
-            log_dirs.add(log_file.parent)
-            with log_file.open("r", encoding="utf-8") as f:
-                contents.extend(yaml.full_load(f) or [])
-            log_file.unlink()  # Remove individual log file after reading
-
-        combine_yaml_in_single_folder(log_dirs)
-        logger.debug(contents)
-
-        # Sort and save combined logs
-        contents.sort(key=lambda x: x.get("ended time", ""))
-        for index, dic in enumerate(contents, start=1):
-            dic.update({"index": index})
-
-        with combined_log_file.open("w", encoding="utf-8") as f:
-            yaml.dump(
-                contents,
-                f,
-                default_flow_style=False,
-                sort_keys=False,
-                encoding="utf-8",
-                allow_unicode=True,
-                indent=4,
-                width=220,
+
+        # Discover daily logs and group per-process logs by folder and date in one walk
+        daily_log_files: set[Path] = set()
+        logs_by_date: dict[tuple[str, str], list[str]] = {}
+        for log_dir, log_file_name in _iter_log_files(os.fspath(pardir)):
+            if len(log_file_name) == 17:  # log_YYYYMMDD.yaml
+                daily_log_files.add(Path(log_dir, log_file_name))
+                continue
+            date = _get_log_date(log_file_name)
+            if date:
+                logs_by_date.setdefault((log_dir, date), []).append(log_file_name)
+
+        # Phase 1: merge per-process logs into daily logs, one folder/date group per worker
+        jobs = [
+            (log_dir, date, log_file_names)
+            for (log_dir, date), log_file_names in logs_by_date.items()
+        ]
+        merged_log_files: list[tuple[str, list[str]]] = []
+        if len(jobs) > 1:
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=min(len(jobs), os.cpu_count() or 1)
+            ) as executor:
+                futures = {executor.submit(_merge_daily_log, job): job for job in jobs}
+                for future in concurrent.futures.as_completed(futures):
+                    try:
+                        daily_log_files.add(future.result())
+                    except Exception as e:
+                        logger.error(f"Failed to merge logs in {futures[future][0]}: {e}")
+                    else:
+                        merged_log_files.append((futures[future][0], futures[future][2]))
+        elif jobs:
+            daily_log_files.add(_merge_daily_log(jobs[0]))
+            merged_log_files.append((jobs[0][0], jobs[0][2]))
+
+        # Remove the merged per-process logs in one batch. This has to happen before Phase 2: their
+        # entries now live in the daily logs, and merging them again on a later run would duplicate them.
+        for log_dir, log_file_names in merged_log_files:
+            for log_file_name in log_file_names:
+                Path(log_dir, log_file_name).unlink(missing_ok=True)
+
+        # Phase 2: rebuild the combined log from every daily log. The daily logs are parsed and sorted
+        # in a process pool (parsing is CPU bound) and streamed out with heapq.merge.
+        sort_key = operator.itemgetter("ended time")
+        daily_log_files = list(daily_log_files)
+        if len(daily_log_files) > 1:
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=min(len(daily_log_files), os.cpu_count() or 1)
+            ) as executor:
+                results = list(
+                    executor.map(_load_sorted_daily_log, daily_log_files, chunksize=16)
+                )
+        else:
+            results = [_load_sorted_daily_log(daily_log_file) for daily_log_file in daily_log_files]
+
+        daily_contents = []
+        for daily_log_file, (entries, dropped_count) in zip(daily_log_files, results):
+            if dropped_count:
+                logger.warning(f"Dropped {dropped_count} malformed entries from {daily_log_file}")
+            daily_contents.append(entries)
+
+        # Stream the merged entries straight into a temporary file, then swap it in so an interrupted
+        # run never leaves a truncated combined log. The large write buffer keeps the write calls few.
+        entry_count = 0
+        tmp_log_file = combined_log_file.with_suffix(".yaml.tmp")
+        with tmp_log_file.open("wb", buffering=COMBINED_LOG_WRITE_BUFFER) as f:
+            for entry_count, dic in enumerate(heapq.merge(*daily_contents, key=sort_key), start=1):
+                dic.update({"index": entry_count})
+                yaml.dump(
+                    [dic],
+                    f,
+                    Dumper=SafeDumper,
+                    default_flow_style=False,
+                    sort_keys=False,
+                    encoding="utf-8",
+                    allow_unicode=True,
+                    indent=4,
+                    width=220,
+                )
+            if not entry_count:
+                f.write(b"[]\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_log_file, combined_log_file)
+        logger.debug(f"Combined {entry_count} success log entries into {combined_log_file}")
+
+
+class BufferedSuccessLog(SuccessLog):
+    """
+    Success log that keeps entries in memory and writes them in batches, every
+    SUCCESS_LOG_FLUSH_EVERY entries or SUCCESS_LOG_FLUSH_INTERVAL seconds.
+
+    One instance is shared per directory and log type within a process (see get()), and pending
+    entries are flushed when the process exits, including process pool workers. get() writes the
+    undated log through, since the phone flow skips the files it lists and must not lose entries on a crash.
+    """
+
+    _instances: dict[tuple[Path, bool], "BufferedSuccessLog"] = {}
+    _pid: Optional[int] = None  # Process that owns _instances
+
+    def __init__(
+        self,
+        path: Path,
+        log_date: bool = True,
+        flush_every: int = SUCCESS_LOG_FLUSH_EVERY,
+        flush_interval: float = SUCCESS_LOG_FLUSH_INTERVAL,
+    ):
+        """
+        Initialize the BufferedSuccessLog instance.
+
+        Args:
+            path (Path): Path to the success log directory or file.
+            log_date (bool): Whether to include the date in the file name.
+            flush_every (int): Number of pending entries that triggers a flush.
+            flush_interval (float): Seconds since the last flush that trigger a flush.
+        """
+        super().__init__(path, log_date)
+        self._pending: list[dict] = []
+        self._flush_every = flush_every
+        self._flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+        # multiprocessing finalizers also run when pool workers exit, unlike atexit handlers
+        multiprocessing.util.Finalize(None, self.flush, exitpriority=10)
+
+    @classmethod
+    def get(cls, path: Path, log_date: bool = True) -> "BufferedSuccessLog":
+        """
+        Return the buffered success log of this process for a directory, creating it on first use.
+
+        Args:
+            path (Path): Path to the success log directory.
+            log_date (bool): Whether to include the date in the file name.
+
+        Returns:
+            BufferedSuccessLog: The shared instance.
+        """
+        if cls._pid != os.getpid():
+            # Instances inherited through fork have no finalizer here, and their pending entries
+            # are written by the parent, so the child starts its own registry
+            cls._instances = {}
+            cls._pid = os.getpid()
+        key = (Path(path), log_date)
+        if key not in cls._instances:
+            cls._instances[key] = cls(
+                Path(path), log_date, flush_every=SUCCESS_LOG_FLUSH_EVERY if log_date else 1
             )
+        return cls._instances[key]
+
+    @classmethod
+    def flush_all(cls):
+        """
+        Flush the pending entries of every buffered success log of this process.
+        """
+        if cls._pid != os.getpid():  # Nothing created in this process yet
+            return
+        for success_log in cls._instances.values():
+            success_log.flush()
+
+    def write(self, log_dic: dict = None):
+        """
+        Buffer the log dictionary, flushing when the size or time threshold is reached.
+
+        Args:
+            log_dic (dict): Dictionary containing success log data.
+        """
+        log_dic.setdefault("ended time", datetime.now().strftime("%Y%m%d_%H:%M:%S"))
+        self._pending.append(log_dic)
+        if (
+            len(self._pending) >= self._flush_every
+            or time.monotonic() - self._last_flush >= self._flush_interval
+        ):
+            self.flush()
+
+    def flush(self):
+        """
+        Write the pending entries to the success log file in one batch.
+        """
+        pending, self._pending = self._pending, []
+        self._last_flush = time.monotonic()
+        if pending:
+            self.write_entries(pending)
+
+
+class BackgroundAppendLog:
+    """
+    Appends text lines to log files from a background thread, so callers never wait on file IO
+    (which can stall for long on network shares). Lines queued together are written with one append
+    per file, and pending lines are written before the process exits, including process pool workers.
+    """
+
+    _queue: Optional[queue.Queue] = None
+    _pid: Optional[int] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def append(cls, path: Path, line: str):
+        """
+        Queue a line to be appended to a log file.
+
+        Args:
+            path (Path): Path to the log file; its directory must exist.
+            line (str): Line to append, without the line ending.
+        """
+        if cls._pid != os.getpid():  # Not started yet, or inherited through fork without the thread
+            with cls._lock:
+                if cls._pid != os.getpid():
+                    cls._start()
+        cls._queue.put((Path(path), line + "\n"))
+
+    @classmethod
+    def flush(cls):
+        """
+        Wait until every queued line of this process has been written.
+        """
+        if cls._pid == os.getpid():
+            cls._queue.join()
+
+    @classmethod
+    def _start(cls):
+        cls._queue = queue.Queue()
+        cls._pid = os.getpid()
+        threading.Thread(target=cls._drain, name="append-log-writer", daemon=True).start()
+        # multiprocessing finalizers also run when pool workers exit, unlike atexit handlers
+        multiprocessing.util.Finalize(None, cls.flush, exitpriority=10)
+
+    @classmethod
+    def _drain(cls):
+        log_queue = cls._queue
+        while True:
+            items = [log_queue.get()]
+            with contextlib.suppress(queue.Empty):
+                while True:
+                    items.append(log_queue.get_nowait())
+
+            lines_by_path: dict[Path, list[str]] = {}
+            for path, line in items:
+                lines_by_path.setdefault(path, []).append(line)
+            for path, lines in lines_by_path.items():
+                try:
+                    with path.open("a", encoding="utf-8") as log_file:
+                        log_file.write("".join(lines))
+                except OSError as e:
+                    logger.error(f"Cannot write to log file {path}: {e}")
+            for _ in items:
+                log_queue.task_done()
@@ -1,14 +1,21 @@
+import concurrent.futures
 import hashlib
 import re
-import shutil
+from fractions import Fraction
 from pathlib import Path
+from typing import Optional
 
 import ffmpeg
 from loguru import logger
 
+from scripts.controllers.functions import move_file
+from scripts.models.Cache import MediaMetadataStore
 from scripts.models.EncodeError import NoDurationFoundError
 from scripts.settings.common import LOAD_FAILED_LOG, LOAD_FAILED_DIR
 
+# ffprobe frame rates such as "30000/1001"; "0/0" (unknown) does not match
+_FRAME_RATE_RE = re.compile(r"^\s*(\d+)/([1-9]\d*)\s*$")
+
 
 def parse_duration(duration):
     """Parse a duration string formatted as 'HH:MM:SS.sss' into seconds."""
@@ -25,6 +32,12 @@ def parse_duration(duration):
     return 0.0
 
 
+def parse_frame_rate(frame_rate: str) -> Optional[Fraction]:
+    """Parse an ffprobe frame rate such as '30000/1001', or return None if it is missing or unknown."""
+    match = _FRAME_RATE_RE.match(frame_rate or "")
+    return Fraction(int(match.group(1)), int(match.group(2))) if match else None
+
+
 class MediaFile:
     """
     A class to represent a media file and extract its metadata.
@@ -32,8 +45,9 @@ class MediaFile:
     Attributes:
         path (Path): The file path of the media file.
         filename (str): The name of the file.
-        relative_dir (str): The relative directory of the file from the current working directory.
+        relative_dir (Path): The relative directory of the file from the current working directory.
         size (int): The size of the file in bytes.
+        mtime_ns (int): The modification time of the file in nanoseconds.
         probe (dict): Metadata probe data from ffmpeg.
         duration (float): Duration of the media file in seconds.
         comment (str): Comment extracted from the file's metadata.
@@ -49,6 +63,7 @@ class MediaFile:
 
     Methods:
         __init__(path: Path): Initializes the MediaFile object.
+        load_many(paths: list[Path]) -> list[MediaFile]: Initializes MediaFile objects of several files concurrently.
         set_hashes(): Calculates and sets the MD5 and SHA256 hashes of the file.
         set_probe(): Probes the media file to extract metadata; moves file to error directory if probing fails.
         handle_load_failure(): Handles file move to the error directory and logs the failure.
@@ -69,8 +84,10 @@ class MediaFile:
         """
         self.path: Path = path
         self.filename: str = self.path.name
-        self.relative_dir: Path = self.path.relative_to(Path.cwd()).resolve()
-        self.size: int = self.path.stat().st_size
+        self.relative_dir: Path = self.path.parent.relative_to(Path.cwd())
+        stat_result = self.path.stat()
+        self.size: int = stat_result.st_size
+        self.mtime_ns: int = stat_result.st_mtime_ns
         self.probe = None
         self.duration: float = 0  # in seconds
         self.comment = ""
@@ -88,12 +105,38 @@ class MediaFile:
 
         self.set_probe()
         self.set_duration()
+        self.set_comment()
         self.set_video_stream_count()
         self.set_vcodec()
         self.set_vbitrate()
         self.set_streams()
         self.set_hashes()
 
+    @classmethod
+    def load_many(cls, paths: list[Path], max_workers: int = None) -> list["MediaFile"]:
+        """
+        Initializes MediaFile objects of several files concurrently. Probing and hashing mostly wait on
+        ffprobe and disk reads, so threads overlap them instead of running them one file after another.
+        Files that fail to load are logged and left out, so one bad file does not drop the others.
+
+        :param paths: File paths of the media files.
+        :param max_workers: Maximum number of files loaded at the same time, one per file by default.
+        :return: The MediaFile objects of the files that loaded, in the order of paths.
+        """
+        if not paths:
+            return []
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers or len(paths)
+        ) as executor:
+            futures = [executor.submit(cls, path) for path in paths]
+        media_files = []
+        for path, future in zip(paths, futures):
+            try:
+                media_files.append(future.result())
+            except Exception as e:
+                logger.error(f"Failed to load {path}: {e}")
+        return media_files
+
     def set_hashes(self):
         """
         Calculates and sets the MD5 and SHA256 hashes of the file.
@@ -105,10 +148,16 @@ class MediaFile:
     def set_probe(self):
         """
         Probes the media file using ffmpeg to extract metadata. If probing fails, moves the file to the error directory
-        and logs the failure.
+        and logs the failure. Probe data of an unchanged file is read from MediaMetadataStore instead.
 
         :return: None
         """
+        cache_key = MediaMetadataStore.key_for(self.path, self.size, self.mtime_ns)
+        probe = MediaMetadataStore.get(cache_key)
+        # Anything but a complete probe result (a miss, a cache error, a damaged entry) is probed again
+        if isinstance(probe, dict) and "streams" in probe and "format" in probe:
+            self.probe = probe
+            return
         try:
             self.probe = ffmpeg.probe(
                 str(self.path)
@@ -118,6 +167,9 @@ class MediaFile:
             logger.error(f"File cannot be read: {self.path}")
             self.load_failed_dir.mkdir(parents=True, exist_ok=True)
             self.handle_load_failure()
+            return
+        # Saved outside the probe's error handling, so a cache failure never counts as an unreadable file
+        MediaMetadataStore.put(cache_key, self.probe)
 
     def handle_load_failure(self):
         """
@@ -125,7 +177,7 @@ class MediaFile:
         """
         try:
             new_path = self.get_unique_path(self.load_failed_dir)
-            shutil.move(str(self.path), str(new_path))
+            move_file(self.path, new_path)
             with Path(LOAD_FAILED_LOG).open("a", encoding="utf-8") as log_file:
                 log_file.write(f"{self.path} (renamed to: {new_path.name})\n")
         except OSError as e:
@@ -189,11 +241,9 @@ class MediaFile:
                 return 0.0
 
             # Get the average frame rate
-            avg_frame_rate = video_stream.get("avg_frame_rate")
-            if not avg_frame_rate:
+            frame_rate = parse_frame_rate(video_stream.get("avg_frame_rate"))
+            if not frame_rate:
                 return 0.0
-            num, denom = map(int, avg_frame_rate.split("/"))
-            frame_rate = num / denom
 
             # Get the number of frames
             nb_frames = int(video_stream.get("nb_frames", 0))
@@ -1,5 +1,11 @@
+import concurrent.futures
+import contextlib
+import functools
 import re
-import shutil
+import statistics
+import tempfile
+import threading
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional, List, Dict, Tuple
@@ -9,8 +15,9 @@ from loguru import logger
 from scripts.controllers.functions import (
     run_cmd,
     format_timedelta,
-    detect_audio_language_multi_segments,
+    detect_audio_language_segments_iter,
     contains_any_extensions,
+    move_file,
 )
 from scripts.models.EncodeError import (
     CRFSearchFailedError,
@@ -18,9 +25,15 @@ from scripts.models.EncodeError import (
     UnexpectedPreEncoderError,
     NoAudioStreamError,
 )
+from scripts.models.Cache import CRFFingerprintCache, CRFSearchCache, LanguageDetectionCache
+from scripts.models.Log import BackgroundAppendLog
 from scripts.models.MediaFile import MediaFile
 from scripts.models.TempFile import EncodeInfo
-from scripts.settings.common import BASE_ERROR_DIR, LANGUAGE_WORDS
+from scripts.settings.common import (
+    BASE_ERROR_DIR,
+    LANGUAGE_WORDS,
+    FFMPEG_QUIET_OPTIONS,
+)
 from scripts.settings.video import (
     VIDEO_OUT_DIR_ROOT,
     VIDEO_COMMENT_ENCODED,
@@ -35,8 +48,49 @@ from scripts.settings.video import (
     SKIP_VIDEO_CODEC_NAMES,
     ENCODERS,
     VIDEO_NO_AUDIO_FOUND_ERROR_DIR,
+    REUSE_CRF_FOR_SIMILAR_FILES,
+    EARLY_EXIT_MARGIN,
+    NATIVE_CRF_SEARCH,
+    NATIVE_CRF_RANGE,
+    NATIVE_SAMPLE_COUNT,
+    NATIVE_SAMPLE_SECONDS,
 )
 
+# Result line of ab-av1 crf-search, e.g. "crf 32 VMAF 95.21 predicted video stream size 253.42 MiB (45%) taking ..."
+_CRF_SEARCH_RESULT_RE = re.compile(r"crf (\d+).*?(\d+)%", re.IGNORECASE | re.DOTALL)
+# Score printed by ffmpeg's libvmaf filter, e.g. "[Parsed_libvmaf_4 @ 0x55d0] VMAF score: 95.213490"
+_VMAF_SCORE_RE = re.compile(r"VMAF score: ([\d.]+)")
+
+# Stream language tags that are exactly one of LANGUAGE_WORDS, the usual case, match without the substring scan
+_LANGUAGE_WORD_SET = frozenset(LANGUAGE_WORDS)
+
+# Shared across worker processes to cap the number of concurrent CRF searches, see set_crf_search_semaphore
+_crf_search_semaphore = None
+
+
+def set_crf_search_semaphore(semaphore):
+    """
+    Sets the semaphore that limits concurrent CRF searches. Used as a process pool initializer, since
+    multiprocessing semaphores can only be handed to workers when they start.
+
+    :param semaphore: A multiprocessing.BoundedSemaphore shared by all workers.
+    """
+    global _crf_search_semaphore
+    _crf_search_semaphore = semaphore
+
+
+def is_suitable_language(language: str) -> bool:
+    """
+    Checks whether a language tag contains one of LANGUAGE_WORDS, such as "jpn" or "Japanese".
+
+    :param language: Language tag of a stream, or a detected language code.
+    :return: True if the language is one to keep.
+    """
+    language = language.strip().casefold()
+    return language in _LANGUAGE_WORD_SET or any(
+        language_word in language for language_word in LANGUAGE_WORDS
+    )
+
 
 class PreEncoder:
     """
@@ -70,6 +124,7 @@ class PreEncoder:
     crf_checking_time: timedelta = None
     best_ratio: float = None
     renamed_file: Path = None
+    sample_dir: Path = None
 
     def __init__(
         self, media_file: Optional[MediaFile] = None, manual_mode: bool = False
@@ -112,46 +167,60 @@ class PreEncoder:
         if self.media_file:
             self.skip_unneeded_file()
 
+    # (condition, reason) pairs checked in order; the first matching rule skips the file
+    _SKIP_RULES = (
+        (
+            lambda self: self.comment_encoded in self.media_file.comment,
+            lambda self: f"Skipped because already encoded: {self.media_file.path}",
+        ),
+        (
+            lambda self: not self.manual_mode
+            and contains_any_extensions(self.over_sized_tags, self.media_file.path),
+            lambda self: f"Skipped because this file will be oversized when encoded: {self.media_file.path}",
+        ),
+        (
+            lambda self: self.bit_rate <= self.bit_rate_threshold,
+            lambda self: f"Skipped because bitrate below threshold "
+            f"({VIDEO_BITRATE_LOW_THRESHOLD}): {self.media_file.path}",
+        ),
+        (
+            lambda self: self.media_file.vcodec in EXCEPT_FORMAT,
+            lambda self: f"Skipped because format is excluded ({self.media_file.vcodec}): {self.media_file.path}",
+        ),
+    )
+
     def skip_unneeded_file(self):
         """
-        Determines if the media file should be skipped based on predefined criteria.
+        Determines if the media file should be skipped based on predefined criteria (see _SKIP_RULES).
         Moves skipped files to the appropriate directory and logs the reason for skipping.
         """
         if not self.media_file:
             return
 
-        log_word = ""
-        if self.comment_encoded in self.media_file.comment:
-            log_word = f"Skipped because already encoded: {self.media_file.path}"
-        elif (
-            contains_any_extensions(self.over_sized_tags, self.media_file.path)
-            and not self.manual_mode
-        ):
-            log_word = f"Skipped because this file will be oversized when encoded: {self.media_file.path}"
-        elif self.bit_rate <= self.bit_rate_threshold:
-            log_word = (
-                f"Skipped because bitrate below threshold "
-                f"({VIDEO_BITRATE_LOW_THRESHOLD}): {self.media_file.path}"
-            )
-        elif self.media_file.vcodec in EXCEPT_FORMAT:
-            log_word = f"Skipped because format is excluded ({self.media_file.vcodec}): {self.media_file.path}"
-        elif self.encode_stream_count == 0:
+        for condition, reason in self._SKIP_RULES:
+            if condition(self):
+                self._record_skip(reason(self))
+                return
+
+        if self.encode_stream_count == 0:
             logger.error(f"No streams found in: {self.media_file.path}")
             self.media_file.load_failed_dir.mkdir(parents=True, exist_ok=True)
             self.renamed_file = (
                 self.media_file.load_failed_dir / self.media_file.filename
             )
             self.renamed_file.parent.mkdir(parents=True, exist_ok=True)
-            shutil.move(self.media_file.path, self.renamed_file)
-            return
+            move_file(self.media_file.path, self.renamed_file)
 
-        if log_word:
-            with self.skip_log.open("a", encoding="utf-8") as log_file:
-                log_file.write(log_word + "\n")
-            self.encoded_dir.mkdir(parents=True, exist_ok=True)
-            self.renamed_file = self.encoded_dir / self.media_file.filename
-            self.renamed_file.parent.mkdir(parents=True, exist_ok=True)
-            shutil.move(self.media_file.path, self.renamed_file)
+    def _record_skip(self, log_word: str):
+        """
+        Logs why the media file is skipped and moves it to the encoded directory.
+
+        :param log_word: The reason for skipping, written to the skip log.
+        """
+        self.encoded_dir.mkdir(parents=True, exist_ok=True)
+        BackgroundAppendLog.append(self.skip_log, log_word)
+        self.renamed_file = self.encoded_dir / self.media_file.filename
+        move_file(self.media_file.path, self.renamed_file)
 
     def set_suitable_codec_options(self):
         """
@@ -170,10 +239,14 @@ class PreVideoEncoder(PreEncoder):
         best_crf (int): The best CRF value found for encoding.
         best_encoder (str): The best encoder determined for the media file.
         best_ratio (float): The best encoded ratio determined for the media file.
+        sample_dir (Path): Temporary directory of the CRF searches of all encoders of the current file.
     """
 
     def __init__(
-        self, media_file: Optional[MediaFile] = None, manual_mode: bool = False
+        self,
+        media_file: Optional[MediaFile] = None,
+        manual_mode: bool = False,
+        parallel_crf_search: bool = True,
     ):
         """
         Initialize the PreVideoEncoder with a media file and optional manual mode.
@@ -181,8 +254,11 @@ class PreVideoEncoder(PreEncoder):
         Args:
             media_file (Optional[MediaFile]): The media file to be processed.
             manual_mode (bool): Flag indicating if manual mode should be used.
+            parallel_crf_search (bool): Run the CRF searches of the encoders at the same time.
         """
         super().__init__(media_file, manual_mode)
+        self.parallel_crf_search = parallel_crf_search
+        self._sample_lock = threading.Lock()
         if media_file:
             # Set up directories and parameters for encoding
             self.encoded_dir = Path(VIDEO_OUT_DIR_ROOT) / Path(
@@ -208,41 +284,99 @@ class PreVideoEncoder(PreEncoder):
         """
         super().start()
         if self.encode_info.load():
-            # Load encoding information if available
-            self.best_crf = self.encode_info.crf
-            self.best_encoder = self.encode_info.encoder
-            self.manual_mode = True
-            try:
-                self.set_output_streams()
-            except NoAudioStreamError as nase:
-                logger.error(nase)
-                self.move_error_file(
-                    VIDEO_NO_AUDIO_FOUND_ERROR_DIR.name, self.media_file
-                )
+            # Resume with the encoding information saved by an earlier run
+            self._use_fixed_settings(self.encode_info.encoder, self.encode_info.crf)
             return
 
         if self.manual_mode:
             # Use manual mode settings if enabled
-            self.best_crf = MANUAL_CRF
-            self.best_encoder = self.encoders[0]
-            self.set_output_streams()
+            self._use_fixed_settings(self.encoders[0], MANUAL_CRF)
             self.crf_checking_time = timedelta(microseconds=0)
             return
 
         self.set_suitable_codec_options()
 
+    def _use_fixed_settings(self, encoder: str, crf: int):
+        """
+        Use the given encoder and CRF without a CRF search, and select the output streams.
+
+        Args:
+            encoder (str): The encoder to use.
+            crf (int): The CRF value to use.
+        """
+        self.best_encoder = encoder
+        self.best_crf = crf
+        self.manual_mode = True
+        try:
+            self.set_output_streams()
+        except NoAudioStreamError as nase:
+            logger.error(nase)
+            self.move_error_file(VIDEO_NO_AUDIO_FOUND_ERROR_DIR.name, self.media_file)
+
     def set_suitable_codec_options(self):
         """
         Determine the suitable codec options for encoding.
         This method tries to find the best CRF and encoder combination for the media file.
         """
-        crf_check_start_time = datetime.now()
+        # Monotonic clock: cheaper than datetime.now() and unaffected by system clock changes
+        crf_check_start_time = time.monotonic()
+        fingerprint_key = (
+            CRFFingerprintCache.key_for(self.media_file) if REUSE_CRF_FOR_SIMILAR_FILES else None
+        )
+        if fingerprint_key and (cached := CRFFingerprintCache.get(fingerprint_key)):
+            self.best_encoder, self.best_crf, self.best_ratio = cached
+            self.crf_checking_time = timedelta(
+                seconds=time.monotonic() - crf_check_start_time
+            )
+            logger.debug(
+                f"{self.media_file.path}, CRF reused from a similar file: {self.best_encoder}, CRF {self.best_crf}"
+            )
+            return
+
+        if not self.encoders:
+            # Nothing to search with, so the fallback of a failed search is used right away
+            self.best_encoder = AV1_ENCODER
+            self.best_crf = MANUAL_CRF
+            self.manual_mode = True
+            self.crf_checking_time = timedelta(microseconds=0)
+            return
+
         self.best_ratio = 101  # Initialize the best ratio with a high value
+        first_encoder = self.encoders[0]
 
-        for encoder in self.encoders:
+        if len(self.encoders) == 1:
+            # Nothing to compare or share, so the search runs directly in this thread
+            futures = [concurrent.futures.Future()]
+            try:
+                futures[0].set_result(self.check_crf(first_encoder))
+            except Exception as e:
+                futures[0].set_exception(e)
+        else:
+            # The searches are independent and only wait on ab-av1, so they run side by side;
+            # the results are then compared in encoder order as before. A good enough result of the
+            # first encoder cancels the searches that have not started yet (all of them when searching
+            # one encoder at a time); searches already running finish and are compared as usual.
+            # The native search cuts its sample clips into one directory per file, so every encoder reuses them.
+            with tempfile.TemporaryDirectory(
+                prefix=".ab-av1-", dir=self.media_file.path.parent
+            ) as sample_dir, concurrent.futures.ThreadPoolExecutor(
+                max_workers=len(self.encoders) if self.parallel_crf_search else 1
+            ) as executor:
+                self.sample_dir = Path(sample_dir)
+                futures = [executor.submit(self.check_crf, encoder) for encoder in self.encoders]
+                if EARLY_EXIT_MARGIN:
+                    # Runs in the worker as soon as the first search is done, before it takes the next one
+                    futures[0].add_done_callback(
+                        functools.partial(self._cancel_if_good_enough, futures[1:])
+                    )
+            self.sample_dir = None
+
+        for encoder, future in zip(self.encoders, futures):
+            if future.cancelled():
+                continue
             try:
                 # Check CRF for each encoder and update the best CRF and encoder
-                crf, encoded_ratio = self.check_crf(encoder)
+                crf, encoded_ratio = future.result()
                 if encoded_ratio < self.best_ratio:
                     self.best_encoder = encoder
                     self.best_crf = crf
@@ -250,7 +384,7 @@ class PreVideoEncoder(PreEncoder):
             except CRFSearchFailedError:
                 # Handle CRF search failure
                 if not self.best_encoder:
-                    self.best_encoder = self.encoders[0]
+                    self.best_encoder = first_encoder
                 if not self.best_crf:
                     self.best_crf = MANUAL_CRF
                     self.manual_mode = True
@@ -259,12 +393,49 @@ class PreVideoEncoder(PreEncoder):
                 logger.error(e)
                 self.move_error_file(str(type(e)), self.media_file)
 
-        crf_check_end_time = datetime.now()
-        self.crf_checking_time = crf_check_end_time - crf_check_start_time
+        if fingerprint_key and not (self.manual_mode or self.renamed_file):
+            CRFFingerprintCache.put(
+                fingerprint_key, [self.best_encoder, self.best_crf, self.best_ratio]
+            )
+        self.crf_checking_time = timedelta(
+            seconds=time.monotonic() - crf_check_start_time
+        )
         logger.debug(
             f"{self.media_file.path}, CRF checking time: {format_timedelta(self.crf_checking_time)}"
         )
 
+    def _cancel_if_good_enough(
+        self,
+        pending_futures: List[concurrent.futures.Future],
+        future: concurrent.futures.Future,
+    ):
+        """
+        Cancel the searches that have not started yet if a finished search is good enough.
+
+        Args:
+            pending_futures (List[concurrent.futures.Future]): The searches of the other encoders.
+            future (concurrent.futures.Future): The finished result of check_crf.
+        """
+        if self._is_good_enough(future):
+            for pending_future in pending_futures:
+                pending_future.cancel()
+
+    def _is_good_enough(self, future: concurrent.futures.Future) -> bool:
+        """
+        Check whether a CRF search result is small enough to skip the searches of the other encoders.
+
+        Args:
+            future (concurrent.futures.Future): The result of check_crf.
+
+        Returns:
+            bool: True if the encoded ratio is within EARLY_EXIT_MARGIN of MAX_ENCODED_PERCENT.
+        """
+        try:
+            _, encoded_ratio = future.result()
+        except Exception:  # Handled with the other results
+            return False
+        return encoded_ratio <= MAX_ENCODED_PERCENT * EARLY_EXIT_MARGIN
+
     def check_crf(self, encoder: str = AV1_ENCODER) -> Tuple[int, int]:
         """
         Perform CRF (Constant Rate Factor) search to find optimal CRF and encoded ratio.
@@ -279,20 +450,63 @@ class PreVideoEncoder(PreEncoder):
             CRFSearchFailedError: If the CRF search fails.
             SkippedVideoFileError: If the file was marked as skipped.
         """
-        crf_not_matched = 800  # Default value when CRF is not matched
-        encoded_ratio_not_matched = (
-            200  # Default value when encoded ratio is not matched
-        )
-
         if self.renamed_file:  # Skip processing if the file was renamed
             raise SkippedVideoFileError(f"no need to pre-encode: {self.renamed_file}")
 
-        # Construct command for CRF search
-        cmd = (
-            f'ab-av1 crf-search -e {encoder} -i "{self.media_file.path}" '
-            f"--sample-every {SAMPLE_EVERY} --max-encoded-percent {MAX_ENCODED_PERCENT} "
-            f"--min-vmaf {TARGET_VMAF}"
+        cache_key = CRFSearchCache.key_for(
+            self.media_file.path, self.media_file.size, self.media_file.mtime_ns, encoder
         )
+        if cached := CRFSearchCache.get(cache_key):
+            crf, encoded_ratio = cached
+            logger.debug(
+                f"{self.media_file.path}, {encoder}: CRF {crf}, Ratio: {encoded_ratio} (cached)"
+            )
+            return crf, encoded_ratio
+
+        # ab-av1 and the native search start several ffmpeg processes, so the searches running at once are limited
+        with _crf_search_semaphore or contextlib.nullcontext():
+            result = self._native_crf_search(encoder) if NATIVE_CRF_SEARCH else None
+            crf, encoded_ratio = result or self._ab_av1_crf_search(encoder)
+
+        logger.debug(
+            f"{self.media_file.path}, {encoder}: CRF {crf}, Ratio: {encoded_ratio}"
+        )
+        CRFSearchCache.put(cache_key, [crf, encoded_ratio])
+        return crf, encoded_ratio
+
+    def _ab_av1_crf_search(self, encoder: str) -> Tuple[int, int]:
+        """
+        Search the CRF with ab-av1.
+
+        Args:
+            encoder (str): The encoder to be used for CRF search.
+
+        Returns:
+            Tuple[int, int]: The CRF value and encoded ratio.
+
+        Raises:
+            CRFSearchFailedError: If the CRF search fails.
+        """
+        cmd = [
+            "ab-av1",
+            "crf-search",
+            "-e",
+            encoder,
+            "-i",
+            str(self.media_file.path),
+            "--sample-every",
+            SAMPLE_EVERY,
+            "--max-encoded-percent",
+            str(MAX_ENCODED_PERCENT),
+            "--min-vmaf",
+            str(TARGET_VMAF),
+        ]
+        if self.sample_dir:
+            # ab-av1 names its sample cuts after the input alone, so concurrent searches of the same file
+            # would overwrite each other's; every encoder gets its own directory, removed with the file's
+            temp_dir = self.sample_dir / encoder
+            temp_dir.mkdir(exist_ok=True)
+            cmd += ["--temp-dir", str(temp_dir)]
         res = run_cmd(cmd, self.media_file.path, self.error_dir)
 
         if res is None:
@@ -302,21 +516,12 @@ class PreVideoEncoder(PreEncoder):
 
         elif res.returncode == 0:
             # Parse the output for CRF and encoded ratio
-            stdout = res.stdout
-            crf_match = re.search(r"crf (\d+)", stdout.lower())
-            ratio_match = re.search(r"(\d+)%", stdout.lower())
-            crf = int(crf_match.group(1)) if crf_match else crf_not_matched
-            encoded_ratio = (
-                int(ratio_match.group(1)) if ratio_match else encoded_ratio_not_matched
-            )
-            logger.debug(
-                f"{self.media_file.path}, {encoder}: CRF {crf}, Ratio: {encoded_ratio}"
-            )
-
-            if crf == crf_not_matched or encoded_ratio == encoded_ratio_not_matched:
+            result_match = _CRF_SEARCH_RESULT_RE.search(res.stdout)
+            if not result_match:
                 raise CRFSearchFailedError(
                     f"CRF check failed for file: {self.media_file.path}"
                 )
+            crf, encoded_ratio = map(int, result_match.groups())
             return crf, encoded_ratio
 
         elif res.returncode == 1:
@@ -330,6 +535,172 @@ class PreVideoEncoder(PreEncoder):
                 f"{res.stdout}, {res.stderr}",
             )
 
+    def _native_crf_search(self, encoder: str) -> Optional[Tuple[int, int]]:
+        """
+        Search the CRF with ffmpeg directly. Sample clips of the source are encoded and scored with libvmaf,
+        bisecting NATIVE_CRF_RANGE for the highest CRF that still reaches TARGET_VMAF. This saves the
+        ab-av1 start-up and its own ffprobe runs, since the media file has already been probed.
+        The clips are cut from the source once, so each probe reads only the clips.
+
+        Args:
+            encoder (str): The encoder to be used for CRF search.
+
+        Returns:
+            Optional[Tuple[int, int]]: The CRF value and encoded ratio, or None if ffmpeg could not encode
+            or score a sample (for example when it is built without libvmaf).
+
+        Raises:
+            CRFSearchFailedError: If no CRF reaches TARGET_VMAF within MAX_ENCODED_PERCENT.
+        """
+        duration = self.media_file.duration
+        sample_seconds = min(NATIVE_SAMPLE_SECONDS, duration / NATIVE_SAMPLE_COUNT)
+        offsets = [
+            (duration - sample_seconds) * i / (NATIVE_SAMPLE_COUNT + 1)
+            for i in range(1, NATIVE_SAMPLE_COUNT + 1)
+        ]
+
+        best = None
+        low, high = NATIVE_CRF_RANGE
+        with contextlib.ExitStack() as stack:
+            temp_dir = self.sample_dir or Path(
+                stack.enter_context(
+                    tempfile.TemporaryDirectory(
+                        prefix=".temp_crf_search_", dir=self.media_file.path.parent
+                    )
+                )
+            )
+            # The first search cuts the clips, the searches of the other encoders wait for them
+            with self._sample_lock:
+                samples = self._extract_samples(offsets, sample_seconds, temp_dir)
+            while samples and low <= high:
+                crf = (low + high) // 2
+                score = self._score_crf(encoder, crf, samples, temp_dir)
+                if score is None:
+                    return None
+                vmaf, encoded_ratio = score
+                if vmaf >= TARGET_VMAF:
+                    best = crf, round(encoded_ratio)
+                    low = crf + 1
+                else:
+                    high = crf - 1
+
+        if not samples:
+            return None
+        if best is None or best[1] > MAX_ENCODED_PERCENT:
+            raise CRFSearchFailedError(
+                f"CRF check failed for file: {self.media_file.path}"
+            )
+        return best
+
+    def _extract_samples(
+        self, offsets: List[float], sample_seconds: float, temp_dir: Path
+    ) -> Optional[List[Path]]:
+        """
+        Cut the sample clips of the video stream from the source with a single ffmpeg run, unless an earlier
+        search of the file has already cut them. The clips are stream copies, so nothing is decoded here.
+
+        Args:
+            offsets (List[float]): Start times of the sample clips in seconds.
+            sample_seconds (float): Length of each sample clip in seconds.
+            temp_dir (Path): Directory for the sample clips.
+
+        Returns:
+            Optional[List[Path]]: Paths of the sample clips, or None if ffmpeg failed.
+        """
+        samples = [temp_dir / f"sample_{i}.mkv" for i in range(len(offsets))]
+        if all(sample.exists() for sample in samples):
+            return samples
+        cmd = ["ffmpeg", "-y", *FFMPEG_QUIET_OPTIONS]
+        for offset in offsets:
+            cmd += [
+                "-ss",
+                f"{offset:.3f}",
+                "-t",
+                f"{sample_seconds:.3f}",
+                "-i",
+                str(self.media_file.path),
+            ]
+        for i, sample in enumerate(samples):
+            cmd += ["-map", f"{i}:v:0", "-c", "copy", str(sample)]
+
+        res = run_cmd(cmd, self.media_file.path, self.error_dir)
+        if not res or res.returncode != 0:
+            logger.warning(
+                f"Native CRF search failed, falling back to ab-av1: {self.media_file.path}"
+            )
+            return None
+        return samples
+
+    def _score_crf(
+        self, encoder: str, crf: int, samples: List[Path], temp_dir: Path
+    ) -> Optional[Tuple[float, float]]:
+        """
+        Encode the sample clips with the given CRF and score them against the clips.
+
+        Args:
+            encoder (str): The encoder to be used.
+            crf (int): The CRF value to try.
+            samples (List[Path]): Paths of the sample clips.
+            temp_dir (Path): Directory for the encoded clips.
+
+        Returns:
+            Optional[Tuple[float, float]]: The mean VMAF score and the encoded size in percent of the clips,
+            or None if ffmpeg failed.
+        """
+        vmaf_scores = []
+        encoded_size = 0
+        for sample in samples:
+            encoded_clip = temp_dir / f"{sample.stem}_{encoder}_crf{crf}.mkv"
+            encode_cmd = [
+                "ffmpeg",
+                "-y",
+                *FFMPEG_QUIET_OPTIONS,
+                "-i",
+                str(sample),
+                "-c:v",
+                encoder,
+                "-crf",
+                str(crf),
+                str(encoded_clip),
+            ]
+            # The score is read from the log, so the default log level is kept
+            vmaf_cmd = [
+                "ffmpeg",
+                "-hide_banner",
+                "-nostats",
+                "-i",
+                str(encoded_clip),
+                "-i",
+                str(sample),
+                "-lavfi",
+                "[0:v]setpts=PTS-STARTPTS,format=yuv420p[distorted];"
+                "[1:v]setpts=PTS-STARTPTS,format=yuv420p[reference];"
+                "[distorted][reference]libvmaf",
+                "-f",
+                "null",
+                "-",
+            ]
+
+            res = run_cmd(encode_cmd, self.media_file.path, self.error_dir)
+            if res and res.returncode == 0:
+                res = run_cmd(vmaf_cmd, self.media_file.path, self.error_dir)
+            score_match = (
+                _VMAF_SCORE_RE.search(res.stderr)
+                if res and res.returncode == 0
+                else None
+            )
+            if not score_match:
+                logger.warning(
+                    f"Native CRF search failed, falling back to ab-av1: {self.media_file.path}"
+                )
+                return None
+            vmaf_scores.append(float(score_match.group(1)))
+            encoded_size += encoded_clip.stat().st_size
+            encoded_clip.unlink()
+
+        sample_size = sum(sample.stat().st_size for sample in samples)
+        return statistics.fmean(vmaf_scores), 100 * encoded_size / sample_size
+
     def move_error_file(self, dir_name: str, media_file: MediaFile):
         """
         Move the file to an error directory for further analysis.
@@ -340,8 +711,8 @@ class PreVideoEncoder(PreEncoder):
         """
         self.error_dir = Path(BASE_ERROR_DIR) / dir_name / media_file.relative_dir
         self.renamed_file = self.error_dir / media_file.filename
-        self.error_dir.parent.mkdir(parents=True, exist_ok=True)
-        shutil.move(media_file.path, self.renamed_file)
+        self.error_dir.mkdir(parents=True, exist_ok=True)
+        move_file(media_file.path, self.renamed_file)
 
     def set_output_streams(self):
         """
@@ -408,26 +779,37 @@ class PreVideoEncoder(PreEncoder):
         """
         if "language" in stream:
             # Check if the language in the stream matches the desired languages
-            return any(
-                language_word in stream["language"].lower()
-                for language_word in LANGUAGE_WORDS
-            )
+            return is_suitable_language(stream["language"])
 
-        for key in stream.keys():
+        for value in stream.values():
             # Check nested keys for language information
-            if isinstance(stream.get(key), dict) and "language" in stream.get(key):
-                return any(
-                    language_word in stream.get(key)["language"].lower()
-                    for language_word in LANGUAGE_WORDS
-                )
-
-        # Detect language based on audio segments if not explicitly set
-        detected_language = detect_audio_language_multi_segments(
-            self.media_file.path, stream, duration=self.media_file.duration
-        )
-        return any(
-            language_word in detected_language for language_word in LANGUAGE_WORDS
+            if isinstance(value, dict) and "language" in value:
+                return is_suitable_language(value["language"])
+
+        cache_key = LanguageDetectionCache.key_for(
+            self.media_file.path,
+            self.media_file.size,
+            self.media_file.mtime_ns,
+            stream.get("index", 0),
         )
+        detected_language = LanguageDetectionCache.get(cache_key)
+        if detected_language is None:
+            # Detect language based on audio segments if not explicitly set, stopping at the first suitable one
+            detected_language = ""
+            detection_failed = False
+            for detected_language in detect_audio_language_segments_iter(
+                self.media_file.path, stream, duration=self.media_file.duration
+            ):
+                if detected_language is None:
+                    detection_failed = True
+                    detected_language = LANGUAGE_WORDS[0]  # Keep the stream, as before
+                    break
+                if is_suitable_language(detected_language):
+                    break
+            # Only real detections are cached, so a failed one is retried by the next run
+            if not detection_failed:
+                LanguageDetectionCache.put(cache_key, detected_language)
+        return is_suitable_language(detected_language)
 
     def set_output_subtitle_streams(self):
         """
@@ -440,9 +822,5 @@ class PreVideoEncoder(PreEncoder):
         self.output_subtitle_streams = [
             stream
             for stream in self.media_file.subtitle_streams
-            if "language" in stream
-            and any(
-                language_word in stream["language"].lower()
-                for language_word in LANGUAGE_WORDS
-            )
+            if "language" in stream and is_suitable_language(stream["language"])
         ]
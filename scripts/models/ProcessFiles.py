@@ -5,6 +5,11 @@ from pathlib import Path
 import yaml
 from loguru import logger
 
+try:
+    from yaml import CSafeDumper as SafeDumper, CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeDumper, SafeLoader
+
 from scripts.settings.audio import AUDIO_EXTENSIONS
 from scripts.settings.common import DEFAULT_SUCCESS_LOG_YAML
 from scripts.settings.video import EXCEPT_FOLDERS_KEYWORDS, VIDEO_EXTENSIONS
@@ -238,7 +243,7 @@ class ProcessPhoneFiles(ProcessVideoFiles):
         processed_files = set()
         if Path(DEFAULT_SUCCESS_LOG_YAML).is_file():
             with open(DEFAULT_SUCCESS_LOG_YAML, encoding="utf-8") as f:
-                success_log_list = yaml.safe_load(f)
+                success_log_list = yaml.load(f, Loader=SafeLoader)
                 processed_files = {
                     Path(entry.get("input file")).stem for entry in success_log_list
                 }
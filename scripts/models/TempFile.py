@@ -1,7 +1,14 @@
+import json
+import os
 from pathlib import Path
 
 import yaml
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
+
 
 class EncodeInfo:
     def __init__(self, file_hash: str, encoder: str = "", crf: int = 0):
@@ -12,44 +19,65 @@ class EncodeInfo:
         self.file_hash = file_hash
         self.encoder = encoder
         self.crf = crf
-        self.path = Path(f"{file_hash}.yaml")
+        self.path = Path(f"{file_hash}.json")
+        self.legacy_path = Path(f"{file_hash}.yaml")  # Written by earlier versions, still read
         self.ori_video_path = None
 
-    def dump(self, encoder: str = "", crf: int = 0, ori_video_path: str = ""):
+    def update(self, encoder: str = "", crf: int = 0, ori_video_path: str = ""):
         """
-        Update the encoder, CRF, and original video path, and save them to the YAML file.
+        Update the encoder, CRF, and original video path in memory only. Call flush() to save them.
         """
         self.encoder = encoder
         self.crf = crf
         self.ori_video_path = ori_video_path
 
+    def flush(self):
+        """
+        Save the encoder, CRF, and original video path to the JSON file if there is anything to keep.
+        The file is written to a temporary path and swapped in, so it is never left half-written.
+        """
+        if not (self.encoder or self.crf):
+            return
+
         dump_dict = {
             "encoder": self.encoder,
             "crf": self.crf,
             "path": self.ori_video_path,
         }
+        tmp_path = self.path.with_suffix(".json.tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(dump_dict, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+        self.legacy_path.unlink(missing_ok=True)
 
-        if self.encoder or self.crf:
-            with self.path.open("w", encoding="utf-8") as f:
-                yaml.dump(dump_dict, f, default_flow_style=False, sort_keys=False)
+    def dump(self, encoder: str = "", crf: int = 0, ori_video_path: str = ""):
+        """
+        Update the encoder, CRF, and original video path, and save them to the JSON file.
+        """
+        self.update(encoder, crf, ori_video_path)
+        self.flush()
 
     def load(self) -> bool:
         """
-        Load the encoder and CRF from the YAML file if it exists.
+        Load the encoder and CRF from the JSON file, or from the YAML file of earlier versions, if it exists.
         Return True if the file was successfully loaded, otherwise False.
         """
         if self.path.exists():
             with self.path.open("r", encoding="utf-8") as f:
-                obj_dict = yaml.safe_load(f)
-            self.encoder = obj_dict.get("encoder", "")
-            self.crf = obj_dict.get("crf", 0)
-            self.ori_video_path = obj_dict.get("path", "")
-            return True
-        return False
+                obj_dict = json.load(f)
+        elif self.legacy_path.exists():
+            with self.legacy_path.open("r", encoding="utf-8") as f:
+                obj_dict = yaml.load(f, Loader=SafeLoader)
+        else:
+            return False
+        self.encoder = obj_dict.get("encoder", "")
+        self.crf = obj_dict.get("crf", 0)
+        self.ori_video_path = obj_dict.get("path", "")
+        return True
 
     def remove_file(self):
         """
-        Remove the YAML file if it exists.
+        Remove the JSON file, and the YAML file of earlier versions, if they exist.
         """
-        if self.path.exists():
-            self.path.unlink()
+        self.path.unlink(missing_ok=True)
+        self.legacy_path.unlink(missing_ok=True)
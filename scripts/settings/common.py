@@ -19,14 +19,21 @@ ERROR_LOG_FILE = BASE_ERROR_DIR / "error.yaml"  # Log file for errors
 
 # Log files
 COMPLETED_LOG_FILE_NAME = "combined_log.yaml"  # Log file name for completed processes
+COMBINED_LOG_WRITE_BUFFER = 1 << 20  # Write buffer size (bytes) for the combined log
 DEFAULT_SUCCESS_LOG_YAML = "success_log.yaml"  # Default success log file
 COMPLETED_FOLDERS_LOG = "completed_folders.txt"  # Log file for completed folders
 COMMAND_TEXT = "cmd.txt"  # Command text file
+CACHE_DB_FILE = Path.home() / ".cache" / "smart_encoder" / "cache.sqlite3"  # Results reused across runs
+
+# ffmpeg global options that keep its console output to errors only (no progress stats or banner noise)
+FFMPEG_QUIET_OPTIONS = ("-nostats", "-loglevel", "error")
 
 # Configuration values
 SUCCESS_LOG_RANDOM_LENGTH = (
     10  # Random length to mitigate logging issues in multi-process environments
 )
+SUCCESS_LOG_FLUSH_EVERY = 32  # Buffered success log entries written per flush
+SUCCESS_LOG_FLUSH_INTERVAL = 30  # Seconds before buffered success log entries are flushed
 
 # Language codes
 LANGUAGE_WORDS = (
@@ -1,3 +1,5 @@
+import os
+import shlex
 from pathlib import Path
 
 from scripts.settings.common import SKIPPED_DIR, BASE_ERROR_DIR
@@ -27,7 +29,7 @@ VIDEO_EXTENSIONS = (
     ".mts",
 )  # Supported video file extensions
 
-EXCEPT_FORMAT = {"av1"}  # Formats to exclude from processing
+EXCEPT_FORMAT = frozenset({"av1"})  # Formats to exclude from processing
 
 # Encoder Settings
 ENCODERS = ["libsvtav1"]  # List of encoders to use
@@ -57,6 +59,7 @@ EXCEPT_FOLDERS_KEYWORDS = (
     "converted",
     "encoded",
     ".ab-av1-",
+    ".temp_crf_search_",
     "checked",
     "_raw",
     "TARGET_VMAF_HIGH",
@@ -91,21 +94,65 @@ AV1_ENCODER = "libsvtav1"
 OPUS_ENCODER = "libopus"
 
 # Codecs to Skip
-SKIP_VIDEO_CODEC_NAMES = ["mjpeg"]  # Skip encoding for these codecs
+SKIP_VIDEO_CODEC_NAMES = frozenset({"mjpeg"})  # Skip encoding for these codecs
 
 # ab-av1 Parameters
 TARGET_VMAF = 95  # Target Video Multi-Method Assessment Fusion score
 MAX_ENCODED_PERCENT = 97  # Maximum encoded percentage
+EARLY_EXIT_MARGIN = 0.5  # Cancel the pending searches once the first encoder reaches this fraction of MAX_ENCODED_PERCENT (0 = off)
 SAMPLE_EVERY = "7m"  # Sampling interval
+MAX_PARALLEL_CRF_SEARCHES = max(1, (os.cpu_count() or 2) // 2)  # ab-av1 runs at once across all processes
+# Reuse the encoder and CRF found for a file with the same resolution, duration, codec and bitrate
+# (such as another episode of a series) instead of searching again
+REUSE_CRF_FOR_SIMILAR_FILES = False
+# Search the CRF with ffmpeg and libvmaf directly instead of ab-av1 (ab-av1 is still used if ffmpeg fails)
+NATIVE_CRF_SEARCH = False
+NATIVE_CRF_RANGE = (20, 45)  # CRF values bisected by the native search
+NATIVE_SAMPLE_COUNT = 3  # Sample clips per file
+NATIVE_SAMPLE_SECONDS = 20  # Length of each sample clip
 
 # iPhone XR Settings
 MANUAL_VIDEO_BIT_RATE_IPHONE_XR = 30_000  # kbps
 MANUAL_AUDIO_BIT_RATE_IPHONE_XR = 50_000  # kbps
 MANUAL_FPS_IPHONE_XR = 20
+MANUAL_HEIGHT_IPHONE_XR = 414
+GOP_SECONDS_IPHONE_XR = 2  # Keyframe interval; keeps seeking cheap without the encoder's long default GOP
+GOP_SIZE_IPHONE_XR = MANUAL_FPS_IPHONE_XR * GOP_SECONDS_IPHONE_XR
 
-IPHONE_XR_OPTIONS = f" -vf scale=-1:414 -r {MANUAL_FPS_IPHONE_XR} "
+IPHONE_XR_OPTIONS = (
+    f" -vf scale=-1:{MANUAL_HEIGHT_IPHONE_XR} -r {MANUAL_FPS_IPHONE_XR}"
+    f" -g {GOP_SIZE_IPHONE_XR} -keyint_min {GOP_SIZE_IPHONE_XR} "
+)
+IPHONE_XR_OPTIONS_TOKENS = tuple(shlex.split(IPHONE_XR_OPTIONS))  # Pre-tokenized for argv commands
 VIDEO_CODEC_IPHONE_XR = "libsvtav1"
 AUDIO_CODEC_IPHONE_XR = "libopus"
+IPHONE_ENCODE_BATCH_SIZE = 8  # Files encoded by a single ffmpeg process
+# Sources already within the profile (these codecs in an MP4-family container, no larger, faster or higher
+# bitrate than the settings above) are remuxed with -c copy instead of being encoded again
+REMUX_CONTAINERS_IPHONE = frozenset({".mp4", ".m4v", ".mov"})
+REMUX_VIDEO_CODECS_IPHONE = frozenset({"h264", "hevc", "av1"})
+REMUX_AUDIO_CODECS_IPHONE = frozenset({"aac", "opus"})
+
+# Hardware encoding for the iPhone profile. When enabled, the first candidate that works with the installed
+# ffmpeg and hardware is used instead of VIDEO_CODEC_IPHONE_XR. Only H.264 encoders are listed since
+# they play back on the device without extra tagging or filters.
+USE_HW_ENCODER_IPHONE = False
+HW_VIDEO_CODECS_IPHONE = ("h264_nvenc", "h264_qsv", "h264_videotoolbox")
+HW_DECODE_OPTIONS = {  # Input options that decode on the same device as the encoder
+    "h264_nvenc": ("-hwaccel", "cuda"),
+    "h264_qsv": ("-hwaccel", "qsv"),
+    "h264_videotoolbox": ("-hwaccel", "videotoolbox"),
+}
+NUM_NVENC_CHIPS = 1  # NVENC engines of the GPU; workers are spread over them with -gpu when more than one
+PIN_PHONE_WORKERS_TO_CPUS = False  # Give each worker process its own share of CPU cores (Linux only)
+LOW_LATENCY_OPTIONS = {  # Per-encoder options that stop the encoder from buffering frames internally
+    "h264_nvenc": (
+        "-preset", "p1", "-tune", "ull", "-delay", "0", "-bf", "0", "-rc-lookahead", "0", "-zerolatency", "1",
+        "-no-scenecut", "1",  # Fixed GOP, no scene change analysis
+    ),
+    "h264_qsv": ("-async_depth", "1", "-bf", "0"),
+    "libx264": ("-tune", "zerolatency", "-bf", "0", "-x264-params", "sliced-threads=1"),
+}
 
 OUTPUT_DIR_IPHONE = (
     f"converted_{VIDEO_CODEC_IPHONE_XR}_"